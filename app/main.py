@@ -17,27 +17,55 @@
 #  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
 #
 #  main.py
+import os
 
 import falcon
 
 from dogpile.cache import make_region
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker
 
-from app.settings import DB_CONNECTION, DEBUG, DOGPILE_CACHE_SETTINGS
+from app.settings import DB_CONNECTION, DEBUG, DOGPILE_CACHE_SETTINGS, SUBSTRATE_RPC_URL, SUBSTRATE_RPC_TIMEOUT, \
+    TYPE_REGISTRY, USE_NODE_RETRIEVE_BALANCES, PRELOAD_APP, ADMIN_API_TOKEN
 
 from app.middleware.context import ContextMiddleware
 from app.middleware.sessionmanager import SQLAlchemySessionManager
 from app.middleware.cache import CacheMiddleware
+from app.middleware.services import ServiceMiddleware
 
-from app.resources import polkascan
+from app.models.data import BlockTotal
+from app.resources import polkascan, admin
+from app.services.chain import ChainHead
+from app.services.runtime import RuntimeRegistry
+from app.services.networkstats import NetworkStatistics
+from app.services.substrate import SubstrateRPCClient
+from app.services.statistics import ResourceStatistics
+from app.utils.cache import LocalCache
 
 
 # Database connection
 engine = create_engine(DB_CONNECTION, echo=DEBUG, isolation_level="READ_UNCOMMITTED", pool_pre_ping=True)
 session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+
+# Discard pooled connections inherited from another process, e.g. when application is preloaded before fork
+@event.listens_for(engine, 'connect')
+def connect(dbapi_connection, connection_record):
+    connection_record.info['pid'] = os.getpid()
+
+
+@event.listens_for(engine, 'checkout')
+def checkout(dbapi_connection, connection_record, connection_proxy):
+    if connection_record.info['pid'] != os.getpid():
+        connection_record.connection = connection_proxy.connection = None
+        raise exc.DisconnectionError(
+            'Connection record belongs to pid {}, attempting to check out in pid {}'.format(
+                connection_record.info['pid'], os.getpid()
+            )
+        )
+
+
 # Define cache region
 cache_region = make_region().configure(
             'dogpile.cache.redis',
@@ -50,11 +78,60 @@ cache_region = make_region().configure(
             }
 )
 
+# Same Redis database, for short-lived entries like lists versioned by chain head, not found responses and storage
+volatile_cache_region = make_region().configure(
+            'dogpile.cache.redis',
+            arguments={
+                'host': DOGPILE_CACHE_SETTINGS['host'],
+                'port': DOGPILE_CACHE_SETTINGS['port'],
+                'db': DOGPILE_CACHE_SETTINGS['db'],
+                'redis_expiration_time': DOGPILE_CACHE_SETTINGS['volatile_redis_expiration_time'],
+                'distributed_lock': True
+            }
+)
+
+# Define per-worker in-memory cache tier
+local_cache = LocalCache(
+    max_items=DOGPILE_CACHE_SETTINGS['local_cache_max_items'],
+    max_bytes=DOGPILE_CACHE_SETTINGS['local_cache_max_bytes']
+)
+
+# Keep track of chain head to version list caches
+chain_head = ChainHead(poll_interval=DOGPILE_CACHE_SETTINGS['chain_head_poll_interval'])
+
+# Collect cache and latency statistics per resource
+statistics = ResourceStatistics(cache_region, flush_interval=DOGPILE_CACHE_SETTINGS['statistics_flush_interval'])
+
+# Keep runtime metadata in memory for documentation and error lookups
+runtime_registry = RuntimeRegistry(chain_head)
+
+# Share network statistics snapshot of current chain head between workers
+network_statistics = NetworkStatistics(
+    cache_region,
+    chain_head,
+    ChainHead(poll_interval=DOGPILE_CACHE_SETTINGS['chain_head_poll_interval'], model=BlockTotal)
+)
+
+# Keep-alive connection to Substrate node per worker, storage results are cached per block
+substrate_client = SubstrateRPCClient(
+    SUBSTRATE_RPC_URL,
+    type_registry_preset=TYPE_REGISTRY,
+    timeout=SUBSTRATE_RPC_TIMEOUT,
+    cache_region=volatile_cache_region,
+    head_poll_interval=DOGPILE_CACHE_SETTINGS['chain_head_poll_interval'],
+    cache_expiration_time=DOGPILE_CACHE_SETTINGS['storage_cache_expiration_time']
+)
+
+# Load type registry before workers are forked, so it is shared copy-on-write
+if USE_NODE_RETRIEVE_BALANCES == 'True' and PRELOAD_APP == 'True':
+    substrate_client.init_codec()
+
 # Define application
 app = falcon.API(middleware=[
     ContextMiddleware(),
     SQLAlchemySessionManager(session_factory),
-    CacheMiddleware(cache_region)
+    CacheMiddleware(cache_region, local_cache, chain_head, statistics, volatile_cache_region),
+    ServiceMiddleware(runtime_registry, network_statistics, substrate_client)
 ])
 
 # Application routes
@@ -66,6 +143,8 @@ app.add_route('/extrinsic', polkascan.ExtrinsicListResource())
 app.add_route('/extrinsic/{extrinsic_id}', polkascan.ExtrinsicDetailResource())
 app.add_route('/event', polkascan.EventsListResource())
 app.add_route('/event/{event_id}', polkascan.EventDetailResource())
+app.add_route('/batch/{item_type}', polkascan.BatchResource())
+app.add_route('/export/{item_type}', polkascan.ExportResource())
 app.add_route('/runtime', polkascan.RuntimeListResource())
 app.add_route('/runtime/{item_id}', polkascan.RuntimeDetailResource())
 app.add_route('/runtime-call', polkascan.RuntimeCallListResource())
@@ -83,6 +162,7 @@ app.add_route('/balances/transfer', polkascan.BalanceTransferListResource())
 app.add_route('/balances/transfer/{item_id}', polkascan.BalanceTransferDetailResource())
 app.add_route('/account', polkascan.AccountResource())
 app.add_route('/account/{item_id}', polkascan.AccountDetailResource())
+app.add_route('/account/{item_id}/balance-history', polkascan.AccountBalanceHistoryResource())
 app.add_route('/accountindex', polkascan.AccountIndexListResource())
 app.add_route('/accountindex/{item_id}', polkascan.AccountIndexDetailResource())
 app.add_route('/log', polkascan.LogListResource())
@@ -94,3 +174,6 @@ app.add_route('/session/nominator', polkascan.SessionNominatorListResource())
 app.add_route('/session/validator/{item_id}', polkascan.SessionValidatorDetailResource())
 app.add_route('/contract/contract', polkascan.ContractListResource())
 app.add_route('/contract/contract/{item_id}', polkascan.ContractDetailResource())
+
+if ADMIN_API_TOKEN:
+    app.add_route('/admin/resource-stats', admin.ResourceStatisticsResource())
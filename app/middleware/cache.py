@@ -21,14 +21,22 @@
 
 class CacheMiddleware:
 
-    def __init__(self, cache_region):
+    def __init__(self, cache_region, local_cache=None, chain_head=None, statistics=None, volatile_cache_region=None):
         self.cache_region = cache_region
+        self.volatile_cache_region = volatile_cache_region or cache_region
+        self.local_cache = local_cache
+        self.chain_head = chain_head
+        self.statistics = statistics
 
     def process_request(self, req, resp):
         pass
 
     def process_resource(self, req, resp, resource, params):
         resource.cache_region = self.cache_region
+        resource.volatile_cache_region = self.volatile_cache_region
+        resource.local_cache = self.local_cache
+        resource.chain_head = self.chain_head
+        resource.statistics = self.statistics
 
     def process_response(self, req, resp, resource, req_succeeded):
         pass
@@ -0,0 +1,32 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  services.py
+
+
+class ServiceMiddleware:
+
+    def __init__(self, runtime_registry, network_statistics, substrate_client):
+        self.runtime_registry = runtime_registry
+        self.network_statistics = network_statistics
+        self.substrate_client = substrate_client
+
+    def process_resource(self, req, resp, resource, params):
+        resource.runtime_registry = self.runtime_registry
+        resource.network_statistics = self.network_statistics
+        resource.substrate_client = self.substrate_client
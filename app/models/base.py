@@ -23,15 +23,21 @@ from datetime import datetime
 import pytz
 from dictalchemy import DictableModel
 from sqlalchemy.ext.declarative import declarative_base
-from substrateinterface.utils.ss58 import ss58_encode
 
 from app.settings import SUBSTRATE_ADDRESS_TYPE
+from app.utils.ss58 import ss58_encode
 
 
 class BaseModelObj(DictableModel):
 
     serialize_exclude = None
 
+    # Columns used by serialize_formatting_hook, always loaded when only a subset of columns is selected
+    serialize_required_columns = []
+
+    # Attributes added by serialize_formatting_hook, mapped to the columns they are derived from
+    serialize_derived_fields = {}
+
     def save(self, session):
         session.add(self)
         session.flush()
@@ -40,6 +46,28 @@ class BaseModelObj(DictableModel):
     def serialize_type(self):
         return self.__class__.__name__.lower()
 
+    @classmethod
+    def get_serialize_type(cls):
+        if isinstance(cls.serialize_type, str):
+            return cls.serialize_type
+        return cls.__name__.lower()
+
+    @classmethod
+    def get_serialize_columns(cls, fields):
+        """ Determines which columns are needed to serialize a sparse fieldset
+        :param fields: list of requested attribute names
+        :returns: set of column property names
+        """
+        column_keys = set([prop.key for prop in cls.__mapper__.column_attrs])
+        columns = set(cls.serialize_required_columns)
+
+        for field in fields:
+            if field in column_keys:
+                columns.add(field)
+            columns.update(cls.serialize_derived_fields.get(field, []))
+
+        return columns & column_keys
+
     def serialize_id(self):
         return self.id
 
@@ -47,16 +75,25 @@ class BaseModelObj(DictableModel):
         """ Hook to be able to process data before being serialized """
         return obj_dict
 
-    def serialize(self, exclude=None):
+    def serialize(self, exclude=None, only=None):
         """ Serializes current model to a dict representation
         :param exclude: list of property names to exclude in serialization
+        :param only: list of property names to limit serialization to (sparse fieldset)
         :returns: dict respresentation of current model
         """
 
+        if only is not None:
+            exclude = exclude or self.serialize_exclude or []
+            attributes = {
+                key: getattr(self, key) for key in self.get_serialize_columns(only) if key not in exclude
+            }
+        else:
+            attributes = self.asdict(exclude=exclude or self.serialize_exclude)
+
         obj_dict = {
             'type': self.serialize_type,
             'id': self.serialize_id(),
-            'attributes': self.asdict(exclude=exclude or self.serialize_exclude)
+            'attributes': attributes
         }
 
         obj_dict = self.serialize_formatting_hook(obj_dict)
@@ -105,6 +105,44 @@ class AccountInfoSnapshot(BaseModel):
     nonce = sa.Column(sa.Integer(), nullable=True)
     account_info = sa.Column(sa.JSON(), default=None, server_default=None, nullable=True)
 
+    @classmethod
+    def get_balance_history(cls, session, account_id, from_block, to_block, points):
+        """ Retrieves total balance of an account in given block range, downsampled in the database to at most
+        the given number of points. The balance at the start of the range takes one point, the remaining points
+        are the last snapshots of equally sized block buckets
+        :returns: list of (block_id, balance_total) tuples in ascending order
+        """
+        history = []
+
+        # Balance at start of range is the last snapshot up to and including the first block
+        start = session.query(cls.block_id, cls.balance_total).filter(
+            cls.account_id == account_id,
+            cls.block_id <= from_block
+        ).order_by(cls.block_id.desc()).first()
+
+        if start:
+            history.append((from_block, start[1]))
+            from_block += 1
+            points -= 1
+
+        if points < 1 or from_block > to_block:
+            return history
+
+        bucket_size = max(1, -(-(to_block - from_block + 1) // points))
+        offset = cls.block_id - from_block
+
+        last_snapshots = session.query(sa.func.max(cls.block_id)).filter(
+            cls.account_id == account_id,
+            cls.block_id.between(from_block, to_block)
+        ).group_by(offset - offset % bucket_size)
+
+        history += session.query(cls.block_id, cls.balance_total).filter(
+            cls.account_id == account_id,
+            cls.block_id.in_(last_snapshots)
+        ).order_by(cls.block_id).all()
+
+        return history
+
 
 class Block(BaseModel):
     __tablename__ = 'data_block'
@@ -162,6 +200,10 @@ class Block(BaseModel):
 
         return model
 
+    @classmethod
+    def get_head_id(cls, session):
+        return session.query(sa.func.max(cls.id)).scalar()
+
     @classmethod
     def get_missing_block_ids(cls, session):
         return session.execute(text("""
@@ -188,6 +230,9 @@ class Block(BaseModel):
 class BlockTotal(BaseModel):
     __tablename__ = 'data_block_total'
 
+    serialize_required_columns = ['author']
+    serialize_derived_fields = {'author_id': ['author']}
+
     serialize_type = 'block-total'
 
     id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
@@ -216,6 +261,10 @@ class BlockTotal(BaseModel):
     total_sessions_new = sa.Column(sa.Numeric(precision=65, scale=0), nullable=False)
     total_contracts_new = sa.Column(sa.Numeric(precision=65, scale=0), nullable=False)
 
+    @classmethod
+    def get_head_id(cls, session):
+        return session.query(sa.func.max(cls.id)).scalar()
+
     def serialize_formatting_hook(self, obj_dict):
 
         if self.author:
@@ -258,7 +307,7 @@ class Event(BaseModel):
 
     def serialize_formatting_hook(self, obj_dict):
 
-        for item in obj_dict['attributes']['attributes']:
+        for item in obj_dict['attributes'].get('attributes') or []:
             if item['type'] in ['AccountId', 'AuthorityId', 'Address', 'LookupSource'] and item['value']:
                 # SS58 format AccountId public keys
                 item['orig_value'] = item['value'].replace('0x', '')
@@ -306,6 +355,8 @@ class Event(BaseModel):
 class Extrinsic(BaseModel):
     __tablename__ = 'data_extrinsic'
 
+    serialize_derived_fields = {'address_id': ['address'], 'account': ['address']}
+
     block_id = sa.Column(sa.Integer(), primary_key=True, index=True)
     block = relationship(Block, foreign_keys=[block_id], primaryjoin=block_id == Block.id)
 
@@ -322,7 +373,7 @@ class Extrinsic(BaseModel):
 
     address_length = sa.Column(sa.String(2))
     address = sa.Column(sa.String(64), index=True)
-    account = relationship(Account, foreign_keys=[address], primaryjoin=address == Account.id, lazy='subquery')
+    account = relationship(Account, foreign_keys=[address], primaryjoin=address == Account.id, lazy='selectin')
 
     account_index = sa.Column(sa.String(16), index=True)
     account_idx = sa.Column(sa.Integer(), index=True)
@@ -378,6 +429,8 @@ class Extrinsic(BaseModel):
 class Log(BaseModel):
     __tablename__ = 'data_log'
 
+    serialize_required_columns = ['type_id']
+
     block_id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     log_idx = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     type_id = sa.Column(sa.Integer(), index=True)
@@ -389,7 +442,7 @@ class Log(BaseModel):
 
     def serialize_formatting_hook(self, obj_dict):
 
-        if self.type_id == LOG_TYPE_AUTHORITIESCHANGE:
+        if self.type_id == LOG_TYPE_AUTHORITIESCHANGE and 'data' in obj_dict['attributes']:
 
             for idx, item in enumerate(obj_dict['attributes']['data']['value']):
                 obj_dict['attributes']['data']['value'][idx] = ss58_encode(item.replace('0x', ''), SUBSTRATE_ADDRESS_TYPE)
@@ -440,10 +493,12 @@ class Session(BaseModel):
 class SessionValidator(BaseModel):
     __tablename__ = 'data_session_validator'
 
+    serialize_required_columns = ['validator_session']
+
     session_id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     rank_validator = sa.Column(sa.Integer(), primary_key=True, autoincrement=False, index=True)
     validator_stash = sa.Column(sa.String(64), index=True)
-    validator_stash_account = relationship(Account, foreign_keys=[validator_stash], primaryjoin=validator_stash == Account.id, lazy='subquery')
+    validator_stash_account = relationship(Account, foreign_keys=[validator_stash], primaryjoin=validator_stash == Account.id, lazy='selectin')
     validator_controller = sa.Column(sa.String(64), index=True)
     validator_controller_account = relationship(Account, foreign_keys=[validator_controller],
                                            primaryjoin=validator_controller == Account.id)
@@ -493,12 +548,14 @@ class SessionValidator(BaseModel):
 class SessionNominator(BaseModel):
     __tablename__ = 'data_session_nominator'
 
+    serialize_required_columns = ['nominator_controller']
+
     session_id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     rank_validator = sa.Column(sa.Integer(), primary_key=True, autoincrement=False, index=True)
     rank_nominator = sa.Column(sa.Integer(), primary_key=True, autoincrement=False, index=True)
     nominator_stash = sa.Column(sa.String(64), index=True)
     nominator_stash_account = relationship(Account, foreign_keys=[nominator_stash],
-                                           primaryjoin=nominator_stash == Account.id, lazy='subquery')
+                                           primaryjoin=nominator_stash == Account.id, lazy='selectin')
     nominator_controller = sa.Column(sa.String(64), index=True, nullable=True)
     bonded = sa.Column(sa.Numeric(precision=65, scale=0), nullable=False)
 
@@ -530,6 +587,8 @@ class SessionNominator(BaseModel):
 class AccountIndex(BaseModel):
     __tablename__ = 'data_account_index'
 
+    serialize_required_columns = ['short_address']
+
     id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     short_address = sa.Column(sa.String(24), index=True)
     account_id = sa.Column(sa.String(64), index=True)
@@ -585,6 +644,7 @@ class Runtime(BaseModel):
     __tablename__ = 'runtime'
 
     serialize_exclude = ['json_metadata', 'json_metadata_decoded']
+    serialize_required_columns = ['spec_version']
 
     id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     impl_name = sa.Column(sa.String(255))
@@ -608,8 +668,11 @@ class Runtime(BaseModel):
 
 class RuntimeModule(BaseModel):
     __tablename__ = 'runtime_module'
+
     __table_args__ = (sa.UniqueConstraint('spec_version', 'module_id'),)
 
+    serialize_required_columns = ['spec_version', 'module_id']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer(), nullable=False)
     module_id = sa.Column(sa.String(64), nullable=False)
@@ -631,8 +694,11 @@ class RuntimeModule(BaseModel):
 
 class RuntimeCall(BaseModel):
     __tablename__ = 'runtime_call'
+
     __table_args__ = (sa.UniqueConstraint('spec_version', 'module_id', 'call_id'),)
 
+    serialize_required_columns = ['spec_version', 'module_id', 'call_id']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer(), nullable=False)
     module_id = sa.Column(sa.String(64), nullable=False)
@@ -661,8 +727,11 @@ class RuntimeCallParam(BaseModel):
 
 class RuntimeEvent(BaseModel):
     __tablename__ = 'runtime_event'
+
     __table_args__ = (sa.UniqueConstraint('spec_version', 'module_id', 'event_id'),)
 
+    serialize_required_columns = ['spec_version', 'module_id', 'event_id']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer(), nullable=False)
     module_id = sa.Column(sa.String(64), nullable=False)
@@ -692,6 +761,8 @@ class RuntimeEventAttribute(BaseModel):
 class RuntimeStorage(BaseModel):
     __tablename__ = 'runtime_storage'
 
+    serialize_required_columns = ['spec_version', 'module_id', 'name']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer())
     module_id = sa.Column(sa.String(64))
@@ -716,6 +787,8 @@ class RuntimeStorage(BaseModel):
 class RuntimeConstant(BaseModel):
     __tablename__ = 'runtime_constant'
 
+    serialize_required_columns = ['spec_version', 'module_id', 'name']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer())
     module_id = sa.Column(sa.String(64))
@@ -732,6 +805,8 @@ class RuntimeConstant(BaseModel):
 class RuntimeErrorMessage(BaseModel):
     __tablename__ = 'runtime_error'
 
+    serialize_required_columns = ['spec_version', 'module_id', 'index']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer())
     module_id = sa.Column(sa.String(64))
@@ -746,8 +821,11 @@ class RuntimeErrorMessage(BaseModel):
 
 class RuntimeType(BaseModel):
     __tablename__ = 'runtime_type'
+
     __table_args__ = (sa.UniqueConstraint('spec_version', 'type_string'),)
 
+    serialize_required_columns = ['spec_version', 'type_string']
+
     id = sa.Column(sa.Integer(), primary_key=True)
     spec_version = sa.Column(sa.Integer(), nullable=False)
     type_string = sa.Column(sa.String(255))
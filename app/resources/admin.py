@@ -0,0 +1,73 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  admin.py
+import hmac
+
+import falcon
+
+from app.resources.base import JSONAPIResource
+from app.settings import ADMIN_API_TOKEN
+
+
+class AdminResource(JSONAPIResource):
+    """ Resource that is only accessible with the ADMIN_API_TOKEN in the X-Admin-Token header """
+
+    def on_get(self, req, resp, **kwargs):
+        token = req.get_header('X-Admin-Token') or ''
+
+        if not ADMIN_API_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+            raise falcon.HTTPForbidden(description='Valid X-Admin-Token header required')
+
+        super().on_get(req, resp, **kwargs)
+
+
+class ResourceStatisticsResource(AdminResource):
+
+    def serialize_item(self, item):
+        resource_name, totals = item
+
+        requests = totals.get('requests', 0)
+        computed = totals.get('computed', 0)
+
+        attributes = {
+            'requests': int(requests),
+            'hit_local': int(totals.get('hit_local', 0)),
+            'hit': int(totals.get('hit', 0)),
+            'miss': int(totals.get('miss', 0)),
+            'uncacheable': int(totals.get('uncacheable', 0)),
+            'computed': int(computed),
+            'hit_ratio': (totals.get('hit_local', 0) + totals.get('hit', 0)) / requests if requests else None,
+            'avg_compute_time': totals.get('compute_time', 0) / computed if computed else None,
+            'avg_payload_bytes': totals.get('payload_bytes', 0) / computed if computed else None
+        }
+
+        return {
+            'type': 'resourcestats',
+            'id': resource_name,
+            'attributes': attributes
+        }
+
+    def process_get_response(self, req, resp, **kwargs):
+        return {
+            'status': falcon.HTTP_200,
+            'media': self.get_jsonapi_response(
+                data=[self.serialize_item(item) for item in self.statistics.get_totals().items()]
+            ),
+            'cacheable': False
+        }
@@ -17,35 +17,102 @@
 #  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
 #
 #  base.py
+import gzip
+import json
+import math
+import operator
+import time
 from abc import ABC, abstractmethod
+from hashlib import blake2b
+from urllib.parse import urlencode
 
 import falcon
 from dogpile.cache import CacheRegion
-from dogpile.cache.api import NO_VALUE
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, inspect
+from sqlalchemy.orm import Session, load_only, selectinload, joinedload, noload
 
 from app.models.base import BaseModel
-from app.settings import MAX_RESOURCE_PAGE_SIZE, DOGPILE_CACHE_SETTINGS
+from app.models.data import BlockTotal
+from app.settings import MAX_RESOURCE_PAGE_SIZE, MAX_RESOURCE_COUNT, DOGPILE_CACHE_SETTINGS, \
+    HTTP_CACHE_CONTROL_LIST
+from app.services.chain import ChainHead
+from app.services.runtime import RuntimeRegistry
+from app.services.networkstats import NetworkStatistics
+from app.services.substrate import SubstrateRPCClient
+from app.services.statistics import ResourceStatistics
+from app.utils.cache import LocalCache, SingleFlight
 
 
 class BaseResource(object):
 
     session: Session
     cache_region: CacheRegion
+    volatile_cache_region: CacheRegion
+    local_cache: LocalCache
+    chain_head: ChainHead
+    statistics: ResourceStatistics
+    runtime_registry: RuntimeRegistry
+    network_statistics: NetworkStatistics
+    substrate_client: SubstrateRPCClient
+
+    def get_cursor_condition(self, columns, values, compare):
+        """ Expands a row comparison like (a, b) < (x, y) into a < x OR (a = x AND b < y), which can be
+        resolved with an index range scan
+        """
+        if len(columns) == 1:
+            return compare(columns[0], values[0])
+
+        return or_(
+            compare(columns[0], values[0]),
+            and_(columns[0] == values[0], self.get_cursor_condition(columns[1:], values[1:], compare))
+        )
 
 
 class JSONAPIResource(BaseResource):
 
     cache_expiration_time = None
 
+    # Value of Cache-Control header for successful responses, omitted when None
+    cache_control = None
+
+    # Shared by all resources in this process to coalesce identical in-flight requests
+    single_flight = SingleFlight()
+
+    # Requested attributes per serialize type, set from the 'fields[type]' parameters of the current request
+    sparse_fields = {}
+
     def apply_filters(self, query, params):
         return query
 
     def get_meta(self):
         return {}
 
+    def get_sparse_fields(self, params):
+        """ Parses sparse fieldset parameters, e.g. 'fields[block]=id,hash'
+        :param params: query parameters of the request
+        :returns: dict of serialize type with list of requested attribute names
+        """
+        sparse_fields = {}
+
+        for name, value in params.items():
+            if name.startswith('fields[') and name.endswith(']'):
+                if type(value) is not list:
+                    value = value.split(',')
+                sparse_fields[name[7:-1]] = [field.strip() for field in value if field.strip()]
+
+        return sparse_fields
+
+    def apply_sparse_fields(self, data):
+        """ Limits attributes of serialized item to the requested sparse fieldset of its type """
+        fields = self.sparse_fields.get(data.get('type'))
+
+        if fields is not None and data.get('attributes') is not None:
+            data['attributes'] = {name: value for name, value in data['attributes'].items() if name in fields}
+
+        return data
+
     def serialize_item(self, item):
-        return item.serialize()
+        return item.serialize(only=self.sparse_fields.get(item.serialize_type))
 
     def process_get_response(self, req, resp, **kwargs):
         return {
@@ -93,35 +160,296 @@ class JSONAPIResource(BaseResource):
 
         return result
 
-    def on_get(self, req, resp, **kwargs):
+    def get_cache_key_params(self, params):
+        """ Selects the query parameters that influence the response of this resource
+        :param params: query parameters of the request
+        :returns: dict of relevant parameters with list values sorted
+        """
+        key_params = {}
+
+        for name, value in params.items():
+            if name == 'include' or name.startswith('filter[') or name.startswith('fields['):
+                if type(value) is list:
+                    value = ','.join(sorted(value))
+                key_params[name] = value
+
+        return key_params
+
+    def get_cache_key(self, req, **kwargs):
+        """ Builds a canonical cache key, so requests for the same data share an entry regardless of host,
+        parameter order, default values or unrelated query parameters
+        """
+        return self.build_cache_key(req.params, **kwargs)
+
+    def build_cache_key(self, params, **kwargs):
+        key_params = self.get_cache_key_params(params)
+
+        return '{}:{}?{}'.format(
+            self.__class__.__name__,
+            '&'.join(['{}={}'.format(name, kwargs[name]) for name in sorted(kwargs)]),
+            '&'.join(['{}={}'.format(name, key_params[name]) for name in sorted(key_params)])
+        )
+
+    def get_cache_expiration_time(self):
+        return self.cache_expiration_time
+
+    def get_cache_entry(self, response):
+        """ Encodes the response media once, so cache hits can be written to the response without re-encoding
+        :param response: dict with status, media and cacheable flag as returned by process_get_response
+        :returns: dict with status, encoded (and possibly gzip compressed) body and headers
+        """
+        body = json.dumps(response.get('media'), ensure_ascii=False).encode('utf-8')
+        headers = dict(response.get('headers', {}))
+        content_encoding = None
+
+        if response.get('status') == falcon.HTTP_200:
+            headers['ETag'] = '"{}"'.format(blake2b(body, digest_size=16).hexdigest())
+
+            cache_control = response.get('cache_control', self.cache_control)
+
+            if cache_control:
+                headers['Cache-Control'] = cache_control
+
+        # Compress large bodies once, only the compressed variant is stored
+        if len(body) >= DOGPILE_CACHE_SETTINGS['gzip_min_size']:
+            body = gzip.compress(body, compresslevel=DOGPILE_CACHE_SETTINGS['gzip_compress_level'])
+            content_encoding = 'gzip'
+
+        cache_entry = {
+            'status': response.get('status'),
+            'body': body,
+            'content_encoding': content_encoding,
+            'headers': headers,
+            'cacheable': response.get('cacheable'),
+            'created_at': time.time()
+        }
+
+        # Optional shorter lifetime and invalidation by chain head for this entry
+        if response.get('expiration_time'):
+            cache_entry['expires_at'] = time.time() + response['expiration_time']
+
+        if response.get('valid_until_block') is not None:
+            cache_entry['valid_until_block'] = response['valid_until_block']
+
+        return cache_entry
+
+    def get_cache_region(self, expiration_time):
+        """ Selects the region to store entries with given lifetime in, entries that expire within the Redis TTL of
+        the volatile region are stored there, so they don't occupy Redis for the full TTL of the shared region
+        :param expiration_time: lifetime of the entries in seconds
+        :returns: CacheRegion
+        """
+        if expiration_time <= DOGPILE_CACHE_SETTINGS['volatile_redis_expiration_time']:
+            return self.volatile_cache_region
+        return self.cache_region
+
+    def get_cache_entry_region(self, cache_entry, expiration_time):
+        """ Selects the region to store given cache entry in, taking its own expiration time into account
+        :param cache_entry: dict as returned by get_cache_entry
+        :param expiration_time: lifetime of entries of this resource in seconds
+        :returns: CacheRegion
+        """
+        if cache_entry.get('expires_at'):
+            expiration_time = min(expiration_time, cache_entry['expires_at'] - time.time())
+
+        return self.get_cache_region(expiration_time)
+
+    def is_cache_entry_valid(self, cache_response):
+        if cache_response.get('expires_at') and time.time() > cache_response['expires_at']:
+            return False
+
+        if cache_response.get('valid_until_block') is not None:
+            return self.chain_head.get_block_id(self.session) < cache_response['valid_until_block']
+
+        return True
+
+    @staticmethod
+    def accepts_gzip(req):
+        for value in (req.get_header('Accept-Encoding') or '').split(','):
+            encoding, _, quality = value.strip().partition(';')
+
+            if encoding.strip() in ('gzip', '*'):
+                return quality.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+
+        return False
+
+    def is_not_modified(self, req, etag):
+        if_none_match = req.get_header('If-None-Match')
+
+        if not etag or not if_none_match:
+            return False
+
+        etags = [value.strip() for value in if_none_match.split(',')]
+
+        return '*' in etags or etag in etags or 'W/{}'.format(etag) in etags
+
+    def get_or_create_cache_entry(self, cache_key, expiration_time, req, resp, **kwargs):
+        """ Retrieves cache entry from shared cache or creates it while holding the distributed lock of the region,
+        so only one worker computes the response per key and expiration
+        :returns: tuple of cache entry and cache status
+        """
+        created = []
+
+        def creator():
+            created.append(True)
+            return self.create_cache_entry(req, resp, **kwargs)
 
-        cache_key = '{}-{}'.format(req.method, req.url)
+        cache_region = self.get_cache_region(expiration_time)
+
+        # Both regions use the same Redis database, entries with a shorter lifetime are stored in their own region
+        cache_response = cache_region.get_or_create(
+            cache_key,
+            creator,
+            expiration_time,
+            should_cache_fn=lambda entry: entry.get('cacheable') and
+            self.get_cache_entry_region(entry, expiration_time) is cache_region
+        )
+
+        if created and cache_response.get('cacheable'):
+            entry_region = self.get_cache_entry_region(cache_response, expiration_time)
+
+            if entry_region is not cache_region:
+                entry_region.set(cache_key, cache_response)
+
+        if not created and not self.is_cache_entry_valid(cache_response):
+            cache_region.delete(cache_key)
+            return self.get_or_create_cache_entry(cache_key, expiration_time, req, resp, **kwargs)
+
+        if not created:
+            return cache_response, 'HIT'
+        elif cache_response.get('cacheable'):
+            return cache_response, 'MISS'
+        else:
+            return cache_response, None
+
+    def create_cache_entry(self, req, resp, **kwargs):
+        start_time = time.time()
+        cache_response = self.get_cache_entry(self.process_get_response(req, resp, **kwargs))
+
+        if self.statistics:
+            self.statistics.record_compute(
+                self.__class__.__name__, time.time() - start_time, len(cache_response['body'])
+            )
+
+        return cache_response
+
+    def on_get(self, req, resp, **kwargs):
 
         if self.cache_expiration_time:
-            # Try to retrieve request from cache
-            cache_response = self.cache_region.get(cache_key, self.cache_expiration_time)
+            cache_key = self.get_cache_key(req, **kwargs)
+            expiration_time = self.get_cache_expiration_time()
 
-            if cache_response is not NO_VALUE:
-                resp.set_header('X-Cache', 'HIT')
+            if DOGPILE_CACHE_SETTINGS['debug_headers']:
+                resp.set_header('X-Cache-Key', cache_key)
 
-            else:
-                # Process request
-                cache_response = self.process_get_response(req, resp, **kwargs)
+            # Try to retrieve request from in-process cache first
+            cache_response = None
+            cache_status = 'HIT-LOCAL'
+
+            if self.local_cache:
+                cache_response = self.local_cache.get(cache_key, expiration_time)
+
+                if cache_response is not None and not self.is_cache_entry_valid(cache_response):
+                    self.local_cache.delete(cache_key)
+                    cache_response = None
+
+            if cache_response is None:
+                cache_response, cache_status = self.single_flight.do(
+                    cache_key,
+                    lambda: self.get_or_create_cache_entry(cache_key, expiration_time, req, resp, **kwargs)
+                )
 
-                if cache_response.get('cacheable'):
-                    # Store result in cache
-                    self.cache_region.set(cache_key, cache_response)
-                    resp.set_header('X-Cache', 'MISS')
+                if self.local_cache and cache_response.get('cacheable'):
+                    self.local_cache.set(
+                        cache_key, cache_response, size=len(cache_response['body']),
+                        created_at=cache_response.get('created_at')
+                    )
+
+            if cache_status:
+                resp.set_header('X-Cache', cache_status)
         else:
-            cache_response = self.process_get_response(req, resp, **kwargs)
+            cache_status = None
+            cache_response = self.create_cache_entry(req, resp, **kwargs)
+
+        if self.statistics:
+            self.statistics.record_request(self.__class__.__name__, cache_status)
+
+        self.write_cache_response(req, resp, cache_response)
+
+    def write_cache_response(self, req, resp, cache_response):
+        headers = dict(cache_response.get('headers', {}))
+        body = cache_response.get('body')
+
+        if cache_response.get('content_encoding') == 'gzip':
+            resp.append_header('Vary', 'Accept-Encoding')
+
+            if self.accepts_gzip(req):
+                resp.set_header('Content-Encoding', 'gzip')
+
+                # Compressed representation requires its own entity tag
+                if 'ETag' in headers:
+                    headers['ETag'] = '{}-gzip"'.format(headers['ETag'][:-1])
+            else:
+                body = gzip.decompress(body)
+
+        for name, value in headers.items():
+            resp.set_header(name, value)
 
-        resp.status = cache_response.get('status')
-        resp.media = cache_response.get('media')
+        if self.is_not_modified(req, headers.get('ETag')):
+            resp.status = falcon.HTTP_304
+        else:
+            resp.status = cache_response.get('status')
+            resp.data = body
 
 
 class JSONAPIListResource(JSONAPIResource, ABC):
 
     cache_expiration_time = DOGPILE_CACHE_SETTINGS['default_list_cache_expiration_time']
+    cache_control = HTTP_CACHE_CONTROL_LIST
+
+    # Version cache entries by chain head, so they stay valid until a new block is indexed
+    cache_versioned_by_head = True
+    head_cache_expiration_time = DOGPILE_CACHE_SETTINGS['head_list_cache_expiration_time']
+
+    # Columns of a unique descending sort order, enables cursor paging with page[after] and page[before]
+    cursor_columns = None
+
+    # BlockTotal counter that holds the total of the unfiltered list
+    total_counter = None
+
+    # Loading strategy per relationship of the listed model ('selectin', 'joined' or 'noload'), overrides the
+    # strategy defined in the model
+    relationship_loading = {}
+
+    # Columns read by a customized serialize_item or prefetch_items, merged into the columns loaded for a sparse
+    # fieldset. When None, columns are only restricted for resources using the default serialization
+    required_columns = None
+
+    relationship_loaders = {
+        'selectin': selectinload,
+        'joined': joinedload,
+        'noload': noload
+    }
+
+    def get_cache_key(self, req, **kwargs):
+        cache_key = super().get_cache_key(req, **kwargs)
+
+        if self.cache_versioned_by_head:
+            cache_key = '{}-{}'.format(self.chain_head.get_block_id(self.session), cache_key)
+
+        return cache_key
+
+    def get_cache_expiration_time(self):
+        if self.cache_versioned_by_head:
+            return self.head_cache_expiration_time
+        return self.cache_expiration_time
+
+    def prefetch_items(self, items):
+        """ Hook to load related data of all items of a page in a fixed number of queries, before the items
+        are serialized
+        :param items: list of items of the current page
+        """
+        pass
 
     def get_included_items(self, items):
         return []
@@ -130,21 +458,195 @@ class JSONAPIListResource(JSONAPIResource, ABC):
     def get_query(self):
         raise NotImplementedError()
 
+    def get_page_params(self, params):
+        page = max(int(params.get('page[number]', 1)) - 1, 0)
+        page_size = max(min(int(params.get('page[size]', 25)), MAX_RESOURCE_PAGE_SIZE), 1)
+        return page, page_size
+
+    def get_cache_key_params(self, params):
+        key_params = super().get_cache_key_params(params)
+
+        page, page_size = self.get_page_params(params)
+        key_params['page[number]'] = page + 1
+        key_params['page[size]'] = page_size
+
+        if self.cursor_columns:
+            for name in ['page[after]', 'page[before]']:
+                if params.get(name):
+                    key_params[name] = params.get(name)
+
+        return key_params
+
+    def get_cursor(self, item):
+        return '-'.join([str(getattr(item, column.key)) for column in self.cursor_columns])
+
+    def parse_cursor(self, cursor):
+        values = cursor.split('-')
+
+        if len(values) != len(self.cursor_columns) or not all([value.isnumeric() for value in values]):
+            raise falcon.HTTPBadRequest('Invalid cursor', 'Cursor "{}" is not valid for this resource'.format(cursor))
+
+        return [int(value) for value in values]
+
+    def apply_cursor_paging(self, query, params):
+        page, page_size = self.get_page_params(params)
+
+        if params.get('page[after]'):
+            values = self.parse_cursor(params.get('page[after]'))
+            query = query.filter(self.get_cursor_condition(self.cursor_columns, values, operator.lt))
+            return query.order_by(None).order_by(*[column.desc() for column in self.cursor_columns])[:page_size]
+        else:
+            values = self.parse_cursor(params.get('page[before]'))
+            query = query.filter(self.get_cursor_condition(self.cursor_columns, values, operator.gt))
+            items = query.order_by(None).order_by(*[column.asc() for column in self.cursor_columns])[:page_size]
+            return list(reversed(items))
+
     def apply_paging(self, query, params):
-        page = int(params.get('page[number]', 1)) - 1
-        page_size = min(int(params.get('page[size]', 25)), MAX_RESOURCE_PAGE_SIZE)
+        if self.cursor_columns and (params.get('page[after]') or params.get('page[before]')):
+            return self.apply_cursor_paging(query, params)
+
+        if self.cursor_columns:
+            # Sort by the complete cursor key, so cursors of the page continue at the right row
+            query = query.order_by(None).order_by(*[column.desc() for column in self.cursor_columns])
+
+        page, page_size = self.get_page_params(params)
         return query[page * page_size: page * page_size + page_size]
 
+    def get_links(self, req, items):
+        """ Builds next and prev links for cursor paging from the parameters that are part of the cache key,
+        so cached responses never contain links specific to one client
+        """
+        if not self.cursor_columns or not items:
+            return {}
+
+        page, page_size = self.get_page_params(req.params)
+        link_params = {
+            name: value for name, value in self.get_cache_key_params(req.params).items()
+            if name not in ['page[number]', 'page[after]', 'page[before]']
+        }
+
+        links = {}
+
+        if len(items) == page_size or req.params.get('page[before]'):
+            links['next'] = '{}?{}'.format(
+                req.path, urlencode(sorted({**link_params, 'page[after]': self.get_cursor(items[-1])}.items()))
+            )
+
+        if page > 0 or req.params.get('page[after]') or (req.params.get('page[before]') and len(items) == page_size):
+            links['prev'] = '{}?{}'.format(
+                req.path, urlencode(sorted({**link_params, 'page[before]': self.get_cursor(items[0])}.items()))
+            )
+
+        return links
+
+    def get_unfiltered_total(self):
+        if self.total_counter:
+            best_block = BlockTotal.query(self.session).order_by(BlockTotal.id.desc()).first()
+            if best_block:
+                return int(getattr(best_block, self.total_counter))
+            return 0
+
+    def get_capped_total(self, query, filter_params):
+        """ Counts at most MAX_RESOURCE_COUNT rows of the filtered query and caches the result, so a total never
+        requires a full table count
+        """
+        count_key = 'count-{}:{}'.format(
+            self.__class__.__name__,
+            '&'.join(['{}={}'.format(name, filter_params[name]) for name in sorted(filter_params)])
+        )
+
+        primary_key = inspect(query.column_descriptions[0]['entity']).primary_key
+
+        return self.cache_region.get_or_create(
+            count_key,
+            lambda: query.order_by(None).with_entities(*primary_key).limit(MAX_RESOURCE_COUNT).count(),
+            DOGPILE_CACHE_SETTINGS['count_cache_expiration_time']
+        )
+
+    def get_page_meta(self, query, params):
+        filter_params = {
+            name: value for name, value in self.get_cache_key_params(params).items() if name.startswith('filter[')
+        }
+
+        total = None
+        total_is_capped = False
+
+        if not filter_params:
+            total = self.get_unfiltered_total()
+
+        if total is None:
+            total = self.get_capped_total(query, filter_params)
+            total_is_capped = True
+
+        page, page_size = self.get_page_params(params)
+
+        page_meta = {
+            'total': total,
+            'page_size': page_size,
+            'page_count': math.ceil(total / page_size)
+        }
+
+        if total_is_capped and total >= MAX_RESOURCE_COUNT:
+            page_meta['total_is_lower_bound'] = True
+
+        return page_meta
+
+    def apply_relationship_loading(self, query):
+        model = query.column_descriptions[0]['entity']
+
+        for name, strategy in self.relationship_loading.items():
+            query = query.options(self.relationship_loaders[strategy](getattr(model, name)))
+
+        return query
+
+    def uses_default_serialization(self):
+        return type(self).serialize_item is JSONAPIResource.serialize_item and \
+            type(self).prefetch_items is JSONAPIListResource.prefetch_items
+
+    def apply_sparse_fieldset(self, query):
+        """ Restricts loaded columns to the requested sparse fieldset, always including primary keys, columns
+        needed to load relationships, columns required by the serialize hooks of the model and columns required
+        by the resource
+        """
+        model = query.column_descriptions[0]['entity']
+        fields = self.sparse_fields.get(model.get_serialize_type())
+
+        if fields is None:
+            return query
+
+        if self.required_columns is None and not self.uses_default_serialization():
+            return query
+
+        mapper = inspect(model)
+
+        columns = model.get_serialize_columns(fields) | set(self.required_columns or [])
+        columns.update([mapper.get_property_by_column(column).key for column in mapper.primary_key])
+
+        for relationship in mapper.relationships:
+            columns.update([mapper.get_property_by_column(column).key for column in relationship.local_columns])
+
+        return query.options(load_only(*[prop.key for prop in mapper.column_attrs if prop.key in columns]))
+
     def process_get_response(self, req, resp, **kwargs):
-        items = self.get_query()
-        items = self.apply_filters(items, req.params)
-        items = self.apply_paging(items, req.params)
+        self.sparse_fields = self.get_sparse_fields(req.params)
+
+        query = self.get_query()
+        query = self.apply_filters(query, req.params)
+        query = self.apply_sparse_fieldset(query)
+
+        meta = self.get_meta()
+        meta.update(self.get_page_meta(query, req.params))
+
+        items = self.apply_paging(self.apply_relationship_loading(query), req.params)
+
+        self.prefetch_items(items)
 
         return {
             'status': falcon.HTTP_200,
             'media': self.get_jsonapi_response(
-                data=[self.serialize_item(item) for item in items],
-                meta=self.get_meta(),
+                data=[self.apply_sparse_fields(self.serialize_item(item)) for item in items],
+                meta=meta,
+                links=self.get_links(req, items),
                 included=self.get_included_items(items)
             ),
             'cacheable': True
@@ -155,6 +657,12 @@ class JSONAPIDetailResource(JSONAPIResource, ABC):
 
     cache_expiration_time = DOGPILE_CACHE_SETTINGS['default_detail_cache_expiration_time']
 
+    # Identifiers start with the block number of the item, e.g. '100' or '100-1'
+    item_id_starts_with_block = False
+
+    # Attributes that are None until related data is indexed, e.g. documentation of the runtime
+    pending_attributes = ()
+
     def get_item_url_name(self):
         return 'item_id'
 
@@ -162,29 +670,66 @@ class JSONAPIDetailResource(JSONAPIResource, ABC):
     def get_item(self, item_id):
         raise NotImplementedError()
 
+    def get_item_block_id(self, item_id):
+        """ Returns the block number in which the requested item would be indexed, if it can be derived from the
+        identifier. A cached not found response for the item is discarded once the chain head reaches that block.
+        """
+        if self.item_id_starts_with_block and item_id.split('-')[0].isnumeric():
+            return int(item_id.split('-')[0])
+
+    def is_item_complete(self, item, data):
+        """ Returns whether the serialized item is final. Incomplete responses expire sooner and are not sent with
+        the Cache-Control header of the resource.
+        """
+        return all(data['attributes'].get(name) is not None for name in self.pending_attributes)
+
+    def get_items(self, item_ids):
+        """ Retrieves multiple items, override to retrieve them with a single query
+        :param item_ids: list of item identifiers
+        :returns: dict of item identifier with item or None if not found
+        """
+        return {item_id: self.get_item(item_id) for item_id in item_ids}
+
     def get_relationships(self, include_list, item):
         return {}
 
     def process_get_response(self, req, resp, **kwargs):
-        item = self.get_item(kwargs.get(self.get_item_url_name()))
+        self.sparse_fields = self.get_sparse_fields(req.params)
+
+        item_id = kwargs.get(self.get_item_url_name())
+
+        return self.get_item_response(item_id, self.get_item(item_id), req.params.get('include', []))
 
+    def get_item_response(self, item_id, item, include_list):
         if not item:
             response = {
                 'status': falcon.HTTP_404,
                 'media': None,
-                'cacheable': False
+                'cacheable': True,
+                'expiration_time': DOGPILE_CACHE_SETTINGS['not_found_cache_expiration_time']
             }
 
+            block_id = self.get_item_block_id(item_id)
+
+            # Items of blocks that are already indexed will not appear anymore, only the expiration time applies
+            if block_id is not None and block_id > self.chain_head.get_block_id(self.session):
+                response['valid_until_block'] = block_id
+
         else:
+            data = self.serialize_item(item)
 
             response = {
                 'status': falcon.HTTP_200,
                 'media': self.get_jsonapi_response(
-                    data=self.serialize_item(item),
-                    relationships=self.get_relationships(req.params.get('include', []), item),
+                    data=self.apply_sparse_fields(data),
+                    relationships=self.get_relationships(include_list, item),
                     meta=self.get_meta()
                 ),
                 'cacheable': True
             }
 
+            if not self.is_item_complete(item, data):
+                response['expiration_time'] = DOGPILE_CACHE_SETTINGS['incomplete_cache_expiration_time']
+                response['cache_control'] = HTTP_CACHE_CONTROL_LIST
+
         return response
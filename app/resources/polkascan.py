@@ -20,13 +20,17 @@
 from hashlib import blake2b
 
 import binascii
+import csv
+import gzip
+import io
+import json
+import operator
 
 import falcon
 import pytz
 from dogpile.cache.api import NO_VALUE
-from scalecodec.type_registry import load_type_registry_preset
-from sqlalchemy import func, tuple_, or_
-from sqlalchemy.orm import defer, subqueryload, lazyload, lazyload_all
+from sqlalchemy import tuple_, or_, inspect
+from sqlalchemy.orm import defer, subqueryload, lazyload, lazyload_all, noload
 
 from app import settings
 from app.models.data import Block, Extrinsic, Event, RuntimeCall, RuntimeEvent, Runtime, RuntimeModule, \
@@ -35,12 +39,13 @@ from app.models.data import Block, Extrinsic, Event, RuntimeCall, RuntimeEvent,
     RuntimeErrorMessage, SearchIndex, AccountInfoSnapshot
 from app.resources.base import JSONAPIResource, JSONAPIListResource, JSONAPIDetailResource, BaseResource
 from app.utils.ss58 import ss58_decode, ss58_encode
-from scalecodec.base import RuntimeConfiguration
-from substrateinterface import SubstrateInterface
 
 
 class BlockDetailsResource(JSONAPIDetailResource):
 
+    cache_control = settings.HTTP_CACHE_CONTROL_IMMUTABLE
+    item_id_starts_with_block = True
+
     def get_item_url_name(self):
         return 'block_id'
 
@@ -50,6 +55,20 @@ class BlockDetailsResource(JSONAPIDetailResource):
         else:
             return Block.query(self.session).filter_by(hash=item_id).first()
 
+    def get_items(self, item_ids):
+        block_ids = [int(item_id) for item_id in item_ids if item_id.isnumeric()]
+        block_hashes = [item_id for item_id in item_ids if not item_id.isnumeric()]
+
+        items = {}
+
+        if block_ids:
+            items.update({str(block.id): block for block in Block.query(self.session).filter(Block.id.in_(block_ids))})
+
+        if block_hashes:
+            items.update({block.hash: block for block in Block.query(self.session).filter(Block.hash.in_(block_hashes))})
+
+        return {item_id: items.get(str(int(item_id)) if item_id.isnumeric() else item_id) for item_id in item_ids}
+
     def get_relationships(self, include_list, item):
         relationships = {}
 
@@ -74,14 +93,21 @@ class BlockDetailsResource(JSONAPIDetailResource):
 
 class BlockListResource(JSONAPIListResource):
 
+    cursor_columns = (Block.id,)
+
     def get_query(self):
         return Block.query(self.session).order_by(
             Block.id.desc()
         )
 
+    def get_unfiltered_total(self):
+        return self.chain_head.get_block_id(self.session) + 1
+
 
 class BlockTotalDetailsResource(JSONAPIDetailResource):
 
+    item_id_starts_with_block = True
+
     def get_item(self, item_id):
         if item_id.isnumeric():
             return BlockTotal.query(self.session).get(item_id)
@@ -111,6 +137,8 @@ class BlockTotalDetailsResource(JSONAPIDetailResource):
 
 class BlockTotalListResource(JSONAPIListResource):
 
+    cursor_columns = (BlockTotal.id,)
+
     def get_query(self):
         return BlockTotal.query(self.session).order_by(
             BlockTotal.id.desc()
@@ -135,8 +163,14 @@ class BlockTotalListResource(JSONAPIListResource):
 
 class ExtrinsicListResource(JSONAPIListResource):
 
+    cursor_columns = (Extrinsic.block_id, Extrinsic.extrinsic_idx)
+    total_counter = 'total_extrinsics'
+
     exclude_params = True
 
+    # Serialization only adds the account relationship
+    required_columns = []
+
     def get_query(self):
         return Extrinsic.query(self.session).options(defer('params')).order_by(
             Extrinsic.block_id.desc()
@@ -146,9 +180,9 @@ class ExtrinsicListResource(JSONAPIListResource):
         # Exclude large params from list view
 
         if self.exclude_params:
-            data = item.serialize(exclude=['params'])
+            data = item.serialize(exclude=['params'], only=self.sparse_fields.get(item.serialize_type))
         else:
-            data = item.serialize()
+            data = item.serialize(only=self.sparse_fields.get(item.serialize_type))
 
         # Add account as relationship
         if item.account:
@@ -181,14 +215,13 @@ class ExtrinsicListResource(JSONAPIListResource):
             if type(params.get('filter[search_index]')) != list:
                 params['filter[search_index]'] = [params.get('filter[search_index]')]
 
-            search_index = SearchIndex.query(self.session).filter(
+            # Semi-join on the search index, so ordering and paging are performed by the database
+            search_index = self.session.query(SearchIndex.block_id, SearchIndex.extrinsic_idx).filter(
                 SearchIndex.index_type_id.in_(params.get('filter[search_index]')),
                 SearchIndex.account_id == account_id
-            ).order_by(SearchIndex.sorting_value.desc())
+            )
 
-            query = query.filter(tuple_(Extrinsic.block_id, Extrinsic.extrinsic_idx).in_(
-                [[s.block_id, s.extrinsic_idx] for s in search_index]
-            ))
+            query = query.filter(tuple_(Extrinsic.block_id, Extrinsic.extrinsic_idx).in_(search_index))
         else:
 
             self.exclude_params = True
@@ -214,6 +247,14 @@ class ExtrinsicListResource(JSONAPIListResource):
 
 class ExtrinsicDetailResource(JSONAPIDetailResource):
 
+    cache_control = settings.HTTP_CACHE_CONTROL_IMMUTABLE
+    item_id_starts_with_block = True
+    pending_attributes = ('documentation',)
+
+    # Blocks and ExtrinsicFailed events per block of the items retrieved by get_items
+    blocks = {}
+    failed_events = {}
+
     def get_item_url_name(self):
         return 'extrinsic_id'
 
@@ -230,6 +271,46 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
 
         return extrinsic
 
+    def get_items(self, item_ids):
+        keys = {
+            item_id: tuple(int(value) for value in item_id.split('-')) for item_id in item_ids
+            if len(item_id.split('-')) == 2 and item_id.replace('-', '').isnumeric()
+        }
+
+        extrinsic_hashes = set(item_id[2:] for item_id in item_ids if item_id[0:2] == '0x')
+
+        items = {}
+
+        if keys:
+            items.update({
+                (item.block_id, item.extrinsic_idx): item for item in Extrinsic.query(self.session).filter(
+                    tuple_(Extrinsic.block_id, Extrinsic.extrinsic_idx).in_(list(set(keys.values())))
+                )
+            })
+
+        if extrinsic_hashes:
+            for item in Extrinsic.query(self.session).filter(Extrinsic.extrinsic_hash.in_(extrinsic_hashes)):
+                items.setdefault('0x{}'.format(item.extrinsic_hash), item)
+
+        block_ids = set(item.block_id for item in items.values())
+
+        if block_ids:
+            self.blocks = {block.id: block for block in Block.query(self.session).filter(Block.id.in_(block_ids))}
+
+        failed_block_ids = set(item.block_id for item in items.values() if item.error)
+
+        if failed_block_ids:
+            self.failed_events = dict.fromkeys(failed_block_ids)
+
+            for event in Event.query(self.session).filter(
+                Event.block_id.in_(failed_block_ids),
+                Event.event_id == 'ExtrinsicFailed'
+            ).order_by(Event.block_id, Event.event_idx):
+                if self.failed_events[event.block_id] is None:
+                    self.failed_events[event.block_id] = event
+
+        return {item_id: items.get(keys.get(item_id, item_id)) for item_id in item_ids}
+
     def get_relationships(self, include_list, item):
         relationships = {}
 
@@ -266,15 +347,13 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
     def serialize_item(self, item):
         data = item.serialize()
 
-        runtime_call = RuntimeCall.query(self.session).filter_by(
-            module_id=item.module_id,
-            call_id=item.call_id,
-            spec_version=item.spec_version_id
-        ).first()
+        runtime_call = self.runtime_registry.get_call(
+            self.session, item.spec_version_id, item.module_id, item.call_id
+        )
 
-        data['attributes']['documentation'] = runtime_call.documentation
+        data['attributes']['documentation'] = runtime_call['documentation'] if runtime_call else None
 
-        block = Block.query(self.session).get(item.block_id)
+        block = self.blocks.get(item.block_id) or Block.query(self.session).get(item.block_id)
 
         if block.datetime:
             data['attributes']['datetime'] = block.datetime.replace(tzinfo=pytz.UTC).isoformat()
@@ -289,23 +368,27 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
 
         if item.error:
             # Retrieve ExtrinsicFailed event
-            extrinsic_failed_event = Event.query(self.session).filter_by(
-                block_id=item.block_id,
-                event_id='ExtrinsicFailed'
-            ).first()
+            if item.block_id in self.failed_events:
+                extrinsic_failed_event = self.failed_events[item.block_id]
+            else:
+                extrinsic_failed_event = Event.query(self.session).filter_by(
+                    block_id=item.block_id,
+                    event_id='ExtrinsicFailed'
+                ).first()
 
             # Retrieve runtime error
             if extrinsic_failed_event:
                 if 'Module' in extrinsic_failed_event.attributes[0]['value']:
 
-                    error = RuntimeErrorMessage.query(self.session).filter_by(
-                        module_index=extrinsic_failed_event.attributes[0]['value']['Module']['index'],
-                        index=extrinsic_failed_event.attributes[0]['value']['Module']['error'],
-                        spec_version=item.spec_version_id
-                    ).first()
+                    error = self.runtime_registry.get_error(
+                        self.session,
+                        item.spec_version_id,
+                        extrinsic_failed_event.attributes[0]['value']['Module']['index'],
+                        extrinsic_failed_event.attributes[0]['value']['Module']['error']
+                    )
 
                     if error:
-                        data['attributes']['error_message'] = error.documentation
+                        data['attributes']['error_message'] = error['documentation']
                 elif 'BadOrigin' in extrinsic_failed_event.attributes[0]['value']:
                     data['attributes']['error_message'] = 'Bad origin'
                 elif 'CannotLookup' in extrinsic_failed_event.attributes[0]['value']:
@@ -316,6 +399,10 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
 
 class EventsListResource(JSONAPIListResource):
 
+    cursor_columns = (Event.block_id, Event.event_idx)
+    # Unfiltered list excludes ExtrinsicSuccess and ExtrinsicFailed system events
+    total_counter = 'total_events_module'
+
     def apply_filters(self, query, params):
 
         if params.get('filter[address]'):
@@ -335,14 +422,13 @@ class EventsListResource(JSONAPIListResource):
             if type(params.get('filter[search_index]')) != list:
                 params['filter[search_index]'] = [params.get('filter[search_index]')]
 
-            search_index = SearchIndex.query(self.session).filter(
+            # Semi-join on the search index, so ordering and paging are performed by the database
+            search_index = self.session.query(SearchIndex.block_id, SearchIndex.event_idx).filter(
                 SearchIndex.index_type_id.in_(params.get('filter[search_index]')),
                 SearchIndex.account_id == account_id
-            ).order_by(SearchIndex.sorting_value.desc())
+            )
 
-            query = query.filter(tuple_(Event.block_id, Event.event_idx).in_(
-                [[s.block_id, s.event_idx] for s in search_index]
-            ))
+            query = query.filter(tuple_(Event.block_id, Event.event_idx).in_(search_index))
         else:
 
             if params.get('filter[module_id]'):
@@ -364,6 +450,10 @@ class EventsListResource(JSONAPIListResource):
 
 class EventDetailResource(JSONAPIDetailResource):
 
+    cache_control = settings.HTTP_CACHE_CONTROL_IMMUTABLE
+    item_id_starts_with_block = True
+    pending_attributes = ('documentation',)
+
     def get_item_url_name(self):
         return 'event_id'
 
@@ -372,22 +462,39 @@ class EventDetailResource(JSONAPIDetailResource):
             return None
         return Event.query(self.session).get(item_id.split('-'))
 
+    def get_items(self, item_ids):
+        keys = {
+            item_id: tuple(int(value) for value in item_id.split('-')) for item_id in item_ids
+            if len(item_id.split('-')) == 2 and item_id.replace('-', '').isnumeric()
+        }
+
+        items = {}
+
+        if keys:
+            items = {
+                (item.block_id, item.event_idx): item for item in Event.query(self.session).filter(
+                    tuple_(Event.block_id, Event.event_idx).in_(list(set(keys.values())))
+                )
+            }
+
+        return {item_id: items.get(keys.get(item_id)) for item_id in item_ids}
+
     def serialize_item(self, item):
         data = item.serialize()
 
-        runtime_event = RuntimeEvent.query(self.session).filter_by(
-            module_id=item.module_id,
-            event_id=item.event_id,
-            spec_version=item.spec_version_id
-        ).first()
+        runtime_event = self.runtime_registry.get_event(
+            self.session, item.spec_version_id, item.module_id, item.event_id
+        )
 
-        data['attributes']['documentation'] = runtime_event.documentation
+        data['attributes']['documentation'] = runtime_event['documentation'] if runtime_event else None
 
         return data
 
 
 class LogListResource(JSONAPIListResource):
 
+    cursor_columns = (Log.block_id, Log.log_idx)
+
     def get_query(self):
         return Log.query(self.session).order_by(
             Log.block_id.desc()
@@ -396,6 +503,8 @@ class LogListResource(JSONAPIListResource):
 
 class LogDetailResource(JSONAPIDetailResource):
 
+    item_id_starts_with_block = True
+
     def get_item(self, item_id):
         if len(item_id.split('-')) != 2:
             return None
@@ -403,62 +512,33 @@ class LogDetailResource(JSONAPIDetailResource):
 
 
 class NetworkStatisticsResource(JSONAPIResource):
+    """ Network statistics of the current chain head
 
-    cache_expiration_time = 6
+    Responses are not cached per URL, the snapshot is shared between workers and refreshed on every new head.
+    """
 
-    def on_get(self, req, resp, network_id=None):
-        resp.status = falcon.HTTP_200
+    def process_get_response(self, req, resp, **kwargs):
+        return {
+            'status': falcon.HTTP_200,
+            'media': self.get_jsonapi_response(
+                data={
+                    'type': 'networkstats',
+                    'id': kwargs.get('network_id'),
+                    'attributes': self.network_statistics.get_snapshot(self.session)
+                },
+            ),
+            'cacheable': False
+        }
 
-        # TODO make caching more generic for custom resources
-
-        cache_key = '{}-{}'.format(req.method, req.url)
-
-        response = self.cache_region.get(cache_key, self.cache_expiration_time)
-
-        if response is NO_VALUE:
-
-            best_block = BlockTotal.query(self.session).filter_by(id=self.session.query(func.max(BlockTotal.id)).one()[0]).first()
-            if best_block:
-                response = self.get_jsonapi_response(
-                    data={
-                        'type': 'networkstats',
-                        'id': network_id,
-                        'attributes': {
-                            'best_block': best_block.id,
-                            'total_signed_extrinsics': int(best_block.total_extrinsics_signed),
-                            'total_events': int(best_block.total_events),
-                            'total_events_module': int(best_block.total_events_module),
-                            'total_blocks': 'N/A',
-                            'total_accounts': int(best_block.total_accounts),
-                            'total_runtimes': Runtime.query(self.session).count()
-                        }
-                    },
-                )
-            else:
-                response = self.get_jsonapi_response(
-                    data={
-                        'type': 'networkstats',
-                        'id': network_id,
-                        'attributes': {
-                            'best_block': 0,
-                            'total_signed_extrinsics': 0,
-                            'total_events': 0,
-                            'total_events_module': 0,
-                            'total_blocks': 'N/A',
-                            'total_accounts': 0,
-                            'total_runtimes': 0
-                        }
-                    },
-                )
-            self.cache_region.set(cache_key, response)
-            resp.set_header('X-Cache', 'MISS')
-        else:
-            resp.set_header('X-Cache', 'HIT')
 
-        resp.media = response
+class BalanceTransferListResource(JSONAPIListResource):
 
+    cursor_columns = (Event.block_id, Event.event_idx)
 
-class BalanceTransferListResource(JSONAPIListResource):
+    # Accounts of the current page, set by prefetch_items
+    accounts = {}
+
+    required_columns = ['event_id', 'attributes']
 
     def get_query(self):
         return Event.query(self.session).filter(
@@ -476,7 +556,8 @@ class BalanceTransferListResource(JSONAPIListResource):
                 except ValueError:
                     return query.filter(False)
 
-            search_index = SearchIndex.query(self.session).filter(
+            # Semi-join on the search index, so ordering and paging are performed by the database
+            search_index = self.session.query(SearchIndex.block_id, SearchIndex.event_idx).filter(
                 SearchIndex.index_type_id.in_([
                     settings.SEARCH_INDEX_BALANCETRANSFER,
                     settings.SEARCH_INDEX_CLAIMS_CLAIMED,
@@ -484,20 +565,35 @@ class BalanceTransferListResource(JSONAPIListResource):
                     settings.SEARCH_INDEX_STAKING_REWARD
                 ]),
                 SearchIndex.account_id == account_id
-            ).order_by(SearchIndex.sorting_value.desc())
-
-            query = Event.query(self.session).filter(tuple_(Event.block_id, Event.event_idx).in_(
-                [[s.block_id, s.event_idx] for s in search_index]
-            )).order_by(Event.block_id.desc())
+            )
 
+            query = Event.query(self.session).filter(
+                tuple_(Event.block_id, Event.event_idx).in_(search_index)
+            ).order_by(Event.block_id.desc())
 
         return query
 
+    def prefetch_items(self, items):
+        # Retrieve sender and destination accounts of all transfers in one query
+        account_ids = set()
+
+        for item in items:
+            if item.event_id == 'Transfer':
+                account_ids.add(item.attributes[0]['value'].replace('0x', ''))
+                account_ids.add(item.attributes[1]['value'].replace('0x', ''))
+
+        if account_ids:
+            self.accounts = {
+                account.id: account for account in Account.query(self.session).filter(Account.id.in_(account_ids))
+            }
+        else:
+            self.accounts = {}
+
     def serialize_item(self, item):
 
         if item.event_id == 'Transfer':
 
-            sender = Account.query(self.session).get(item.attributes[0]['value'].replace('0x', ''))
+            sender = self.accounts.get(item.attributes[0]['value'].replace('0x', ''))
 
             if sender:
                 sender_data = sender.serialize()
@@ -511,7 +607,7 @@ class BalanceTransferListResource(JSONAPIListResource):
                     }
                 }
 
-            destination = Account.query(self.session).get(item.attributes[1]['value'].replace('0x', ''))
+            destination = self.accounts.get(item.attributes[1]['value'].replace('0x', ''))
 
             if destination:
                 destination_data = destination.serialize()
@@ -573,6 +669,8 @@ class BalanceTransferListResource(JSONAPIListResource):
 
 class BalanceTransferDetailResource(JSONAPIDetailResource):
 
+    item_id_starts_with_block = True
+
     def get_item(self, item_id):
         return Event.query(self.session).get(item_id.split('-'))
 
@@ -628,6 +726,8 @@ class BalanceTransferDetailResource(JSONAPIDetailResource):
 
 class AccountResource(JSONAPIListResource):
 
+    total_counter = 'total_accounts'
+
     def get_query(self):
         return Account.query(self.session).order_by(
             Account.balance_total.desc()
@@ -693,12 +793,6 @@ class AccountDetailResource(JSONAPIDetailResource):
 
     cache_expiration_time = 12
 
-    def __init__(self):
-        RuntimeConfiguration().update_type_registry(load_type_registry_preset('default'))
-        if settings.TYPE_REGISTRY != 'default':
-            RuntimeConfiguration().update_type_registry(load_type_registry_preset(settings.TYPE_REGISTRY))
-        super(AccountDetailResource, self).__init__()
-
     def get_item(self, item_id):
         return Account.query(self.session).filter(or_(Account.address == item_id, Account.index_address == item_id)).first()
 
@@ -715,132 +809,136 @@ class AccountDetailResource(JSONAPIDetailResource):
 
         return relationships
 
-    def serialize_item(self, item):
-        data = item.serialize()
+    def get_balance_history(self, account_id, from_block=0, to_block=None, points=settings.BALANCE_HISTORY_MAX_POINTS):
+        if to_block is None:
+            to_block = self.chain_head.get_block_id(self.session)
 
-        # Get balance history
-        account_info_snapshot = AccountInfoSnapshot.query(self.session).filter_by(
-                account_id=item.id
-        ).order_by(AccountInfoSnapshot.block_id.desc())[:1000]
+        history = AccountInfoSnapshot.get_balance_history(self.session, account_id, from_block, to_block, points)
 
-        data['attributes']['balance_history'] = [
+        return [
             {
                 'name': "Total balance",
                 'type': 'line',
                 'data': [
-                    [item.block_id, float((item.balance_total or 0) / 10**settings.SUBSTRATE_TOKEN_DECIMALS)]
-                    for item in reversed(account_info_snapshot)
+                    [block_id, float((balance_total or 0) / 10**settings.SUBSTRATE_TOKEN_DECIMALS)]
+                    for block_id, balance_total in history
                 ],
             }
         ]
 
-        if settings.USE_NODE_RETRIEVE_BALANCES == 'True':
+    def serialize_item(self, item):
+        data = item.serialize()
 
-            substrate = SubstrateInterface(
-                url=settings.SUBSTRATE_RPC_URL,
-                type_registry_preset=settings.TYPE_REGISTRY
-            )
+        # Get balance history of full lifetime of account
+        data['attributes']['balance_history'] = self.get_balance_history(item.id)
+
+        if settings.USE_NODE_RETRIEVE_BALANCES == 'True':
 
             if settings.SUBSTRATE_STORAGE_BALANCE == 'Account':
-                storage_call = RuntimeStorage.query(self.session).filter_by(
-                    module_id='system',
-                    name='Account',
-                ).order_by(RuntimeStorage.spec_version.desc()).first()
+                storage_functions = [('system', 'System', 'Account')]
+            elif settings.SUBSTRATE_STORAGE_BALANCE == 'Balances.Account':
+                storage_functions = [('balances', 'Balances', 'Account')]
+            else:
+                storage_functions = [
+                    ('balances', 'Balances', 'FreeBalance'),
+                    ('balances', 'Balances', 'ReservedBalance'),
+                    ('system', 'System', 'AccountNonce')
+                ]
+
+            queries = []
+
+            for module_id, module, function in storage_functions:
+                storage_call = self.runtime_registry.get_latest_storage(self.session, module_id, function)
 
                 if storage_call:
-                    account_data = substrate.get_storage(
-                        block_hash=None,
-                        module='System',
-                        function='Account',
-                        params=[item.id],
-                        return_scale_type=storage_call.type_value,
-                        hasher=storage_call.type_hasher,
-                        metadata_version=settings.SUBSTRATE_METADATA_VERSION
-                    )
+                    queries.append({
+                        'module': module,
+                        'function': function,
+                        'params': [item.id],
+                        'hasher': storage_call['type_hasher'],
+                        'return_scale_type': storage_call['type_value']
+                    })
+
+            # Retrieve all storage entries in one batched request
+            storage = {
+                (query['module'], query['function']): value
+                for query, value in zip(queries, self.substrate_client.get_storage_batch(queries))
+            }
 
-                    if account_data:
-                        data['attributes']['free_balance'] = account_data['data']['free']
-                        data['attributes']['reserved_balance'] = account_data['data']['reserved']
-                        data['attributes']['misc_frozen_balance'] = account_data['data']['miscFrozen']
-                        data['attributes']['fee_frozen_balance'] = account_data['data']['feeFrozen']
-                        data['attributes']['nonce'] = account_data['nonce']
+            if ('System', 'Account') in storage:
+                account_data = storage[('System', 'Account')]
 
-            elif settings.SUBSTRATE_STORAGE_BALANCE == 'Balances.Account':
+                if account_data:
+                    data['attributes']['free_balance'] = account_data['data']['free']
+                    data['attributes']['reserved_balance'] = account_data['data']['reserved']
+                    data['attributes']['misc_frozen_balance'] = account_data['data']['miscFrozen']
+                    data['attributes']['fee_frozen_balance'] = account_data['data']['feeFrozen']
+                    data['attributes']['nonce'] = account_data['nonce']
 
-                storage_call = RuntimeStorage.query(self.session).filter_by(
-                    module_id='balances',
-                    name='Account',
-                ).order_by(RuntimeStorage.spec_version.desc()).first()
+            if ('Balances', 'Account') in storage:
+                account_data = storage[('Balances', 'Account')]
 
-                if storage_call:
-                    account_data = substrate.get_storage(
-                        block_hash=None,
-                        module='Balances',
-                        function='Account',
-                        params=[item.id],
-                        return_scale_type=storage_call.type_value,
-                        hasher=storage_call.type_hasher,
-                        metadata_version=settings.SUBSTRATE_METADATA_VERSION
-                    )
+                if account_data:
+                    data['attributes']['balance_free'] = account_data['free']
+                    data['attributes']['balance_reserved'] = account_data['reserved']
+                    data['attributes']['misc_frozen_balance'] = account_data['miscFrozen']
+                    data['attributes']['fee_frozen_balance'] = account_data['feeFrozen']
+                    data['attributes']['nonce'] = None
 
-                    if account_data:
-                        data['attributes']['balance_free'] = account_data['free']
-                        data['attributes']['balance_reserved'] = account_data['reserved']
-                        data['attributes']['misc_frozen_balance'] = account_data['miscFrozen']
-                        data['attributes']['fee_frozen_balance'] = account_data['feeFrozen']
-                        data['attributes']['nonce'] = None
-            else:
+            if ('Balances', 'FreeBalance') in storage:
+                data['attributes']['free_balance'] = storage[('Balances', 'FreeBalance')]
 
-                storage_call = RuntimeStorage.query(self.session).filter_by(
-                    module_id='balances',
-                    name='FreeBalance',
-                ).order_by(RuntimeStorage.spec_version.desc()).first()
+            if ('Balances', 'ReservedBalance') in storage:
+                data['attributes']['reserved_balance'] = storage[('Balances', 'ReservedBalance')]
 
-                if storage_call:
-                    data['attributes']['free_balance'] = substrate.get_storage(
-                        block_hash=None,
-                        module='Balances',
-                        function='FreeBalance',
-                        params=[item.id],
-                        return_scale_type=storage_call.type_value,
-                        hasher=storage_call.type_hasher,
-                        metadata_version=settings.SUBSTRATE_METADATA_VERSION
-                    )
+            if ('System', 'AccountNonce') in storage:
+                data['attributes']['nonce'] = storage[('System', 'AccountNonce')]
 
-                storage_call = RuntimeStorage.query(self.session).filter_by(
-                    module_id='balances',
-                    name='ReservedBalance',
-                ).order_by(RuntimeStorage.spec_version.desc()).first()
+        return data
 
-                if storage_call:
-                    data['attributes']['reserved_balance'] = substrate.get_storage(
-                        block_hash=None,
-                        module='Balances',
-                        function='ReservedBalance',
-                        params=[item.id],
-                        return_scale_type=storage_call.type_value,
-                        hasher=storage_call.type_hasher,
-                        metadata_version=settings.SUBSTRATE_METADATA_VERSION
-                    )
 
-                storage_call = RuntimeStorage.query(self.session).filter_by(
-                    module_id='system',
-                    name='AccountNonce',
-                ).order_by(RuntimeStorage.spec_version.desc()).first()
+class AccountBalanceHistoryResource(AccountDetailResource):
+    """ Balance history of an account in a block range, e.g. /account/{item_id}/balance-history?from=0&to=1000&points=100 """
 
-                if storage_call:
+    def get_cache_key_params(self, params):
+        key_params = super().get_cache_key_params(params)
 
-                    data['attributes']['nonce'] = substrate.get_storage(
-                        block_hash=None,
-                        module='System',
-                        function='AccountNonce',
-                        params=[item.id],
-                        return_scale_type=storage_call.type_value,
-                        hasher=storage_call.type_hasher,
-                        metadata_version=settings.SUBSTRATE_METADATA_VERSION
-                    )
+        for name in ['from', 'to', 'points']:
+            if params.get(name):
+                key_params[name] = params.get(name)
 
-        return data
+        return key_params
+
+    def get_history_params(self, params):
+        try:
+            from_block = int(params.get('from', 0))
+            to_block = int(params.get('to', self.chain_head.get_block_id(self.session)))
+            points = min(int(params.get('points', settings.BALANCE_HISTORY_MAX_POINTS)), settings.BALANCE_HISTORY_MAX_POINTS)
+        except ValueError:
+            raise falcon.HTTPBadRequest(description='Parameters from, to and points must be numbers')
+
+        if points < 1 or from_block > to_block:
+            raise falcon.HTTPBadRequest(description='Invalid block range or number of points')
+
+        return from_block, to_block, points
+
+    def process_get_response(self, req, resp, **kwargs):
+        self.history_params = self.get_history_params(req.params)
+        return super().process_get_response(req, resp, **kwargs)
+
+    def serialize_item(self, item):
+        from_block, to_block, points = self.history_params
+
+        return {
+            'type': 'balancehistory',
+            'id': item.address,
+            'attributes': {
+                'from_block': from_block,
+                'to_block': to_block,
+                'points': points,
+                'balance_history': self.get_balance_history(item.id, from_block, to_block, points)
+            }
+        }
 
 
 class AccountIndexListResource(JSONAPIListResource):
@@ -877,6 +975,7 @@ class AccountIndexDetailResource(JSONAPIDetailResource):
 class SessionListResource(JSONAPIListResource):
 
     cache_expiration_time = 60
+    cache_versioned_by_head = False
 
     def get_query(self):
         return Session.query(self.session).order_by(
@@ -908,6 +1007,10 @@ class SessionDetailResource(JSONAPIDetailResource):
 class SessionValidatorListResource(JSONAPIListResource):
 
     cache_expiration_time = 60
+    cache_versioned_by_head = False
+
+    # Pages of a session are small, join the stash account instead of a separate query
+    relationship_loading = {'validator_stash_account': 'joined'}
 
     def get_query(self):
         return SessionValidator.query(self.session).order_by(
@@ -963,6 +1066,10 @@ class SessionValidatorDetailResource(JSONAPIDetailResource):
 class SessionNominatorListResource(JSONAPIListResource):
 
     cache_expiration_time = 60
+    cache_versioned_by_head = False
+
+    # Pages of a session are small, join the stash account instead of a separate query
+    relationship_loading = {'nominator_stash_account': 'joined'}
 
     def get_query(self):
         return SessionNominator.query(self.session).order_by(
@@ -997,6 +1104,7 @@ class ContractDetailResource(JSONAPIDetailResource):
 class RuntimeListResource(JSONAPIListResource):
 
     cache_expiration_time = 60
+    cache_versioned_by_head = False
 
     def get_query(self):
         return Runtime.query(self.session).order_by(
@@ -1006,6 +1114,8 @@ class RuntimeListResource(JSONAPIListResource):
 
 class RuntimeDetailResource(JSONAPIDetailResource):
 
+    cache_control = settings.HTTP_CACHE_CONTROL_IMMUTABLE
+
     def get_item(self, item_id):
         return Runtime.query(self.session).get(item_id)
 
@@ -1028,14 +1138,13 @@ class RuntimeDetailResource(JSONAPIDetailResource):
 class RuntimeCallListResource(JSONAPIListResource):
 
     cache_expiration_time = 3600
+    cache_versioned_by_head = False
 
     def apply_filters(self, query, params):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=self.runtime_registry.get_latest_spec_version(self.session))
 
         if params.get('filter[module_id]'):
 
@@ -1083,14 +1192,13 @@ class RuntimeCallDetailResource(JSONAPIDetailResource):
 class RuntimeEventListResource(JSONAPIListResource):
 
     cache_expiration_time = 3600
+    cache_versioned_by_head = False
 
     def apply_filters(self, query, params):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=self.runtime_registry.get_latest_spec_version(self.session))
 
         if params.get('filter[module_id]'):
 
@@ -1138,6 +1246,7 @@ class RuntimeEventDetailResource(JSONAPIDetailResource):
 class RuntimeTypeListResource(JSONAPIListResource):
 
     cache_expiration_time = 3600
+    cache_versioned_by_head = False
 
     def get_query(self):
         return RuntimeType.query(self.session).order_by(
@@ -1148,9 +1257,7 @@ class RuntimeTypeListResource(JSONAPIListResource):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=self.runtime_registry.get_latest_spec_version(self.session))
 
         return query
 
@@ -1158,6 +1265,7 @@ class RuntimeTypeListResource(JSONAPIListResource):
 class RuntimeModuleListResource(JSONAPIListResource):
 
     cache_expiration_time = 3600
+    cache_versioned_by_head = False
 
     def get_query(self):
         return RuntimeModule.query(self.session).order_by(
@@ -1168,9 +1276,7 @@ class RuntimeModuleListResource(JSONAPIListResource):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=self.runtime_registry.get_latest_spec_version(self.session))
 
         return query
 
@@ -1234,6 +1340,7 @@ class RuntimeStorageDetailResource(JSONAPIDetailResource):
 class RuntimeConstantListResource(JSONAPIListResource):
 
     cache_expiration_time = 3600
+    cache_versioned_by_head = False
 
     def get_query(self):
         return RuntimeConstant.query(self.session).order_by(
@@ -1254,3 +1361,315 @@ class RuntimeConstantDetailResource(JSONAPIDetailResource):
             module_id=module_id,
             name=name
         ).first()
+
+
+class BatchResource(JSONAPIResource):
+    """ Retrieves multiple items of one type in a single request, e.g. /batch/extrinsic?ids=100-1,100-2
+
+    Items are taken from the cache entries of their detail resource when present, the remaining items are
+    retrieved with one query and stored in those cache entries.
+    """
+
+    item_resources = {
+        'block': BlockDetailsResource,
+        'extrinsic': ExtrinsicDetailResource,
+        'event': EventDetailResource
+    }
+
+    def get_item_resource(self, item_type):
+        resource = self.item_resources[item_type]()
+
+        # Share services injected by middleware
+        for name in BaseResource.__annotations__:
+            setattr(resource, name, getattr(self, name, None))
+
+        return resource
+
+    def get_item_ids(self, params):
+        item_ids = params.get('ids', [])
+
+        if type(item_ids) is not list:
+            item_ids = item_ids.split(',')
+
+        item_ids = list(dict.fromkeys([item_id.strip() for item_id in item_ids if item_id.strip()]))
+
+        if len(item_ids) > settings.MAX_RESOURCE_PAGE_SIZE:
+            raise falcon.HTTPBadRequest(
+                description='A maximum of {} ids can be requested at once'.format(settings.MAX_RESOURCE_PAGE_SIZE)
+            )
+
+        return item_ids
+
+    def get_cache_entries(self, resource, cache_keys):
+        """ Retrieves valid cache entries from the in-process and shared cache
+        :returns: dict of cache key with cache entry
+        """
+        expiration_time = resource.get_cache_expiration_time()
+        cache_entries = {}
+
+        if self.local_cache:
+            for cache_key in cache_keys:
+                cache_entry = self.local_cache.get(cache_key, expiration_time)
+                if cache_entry is not None and resource.is_cache_entry_valid(cache_entry):
+                    cache_entries[cache_key] = cache_entry
+
+        missing_keys = [cache_key for cache_key in cache_keys if cache_key not in cache_entries]
+
+        if missing_keys:
+            for cache_key, cache_entry in zip(missing_keys, self.cache_region.get_multi(missing_keys, expiration_time)):
+                if cache_entry is not NO_VALUE and resource.is_cache_entry_valid(cache_entry):
+                    cache_entries[cache_key] = cache_entry
+
+        return cache_entries
+
+    def set_cache_entries(self, resource, cache_entries):
+        expiration_time = resource.get_cache_expiration_time()
+        region_entries = {}
+
+        for cache_key, cache_entry in cache_entries.items():
+            cache_region = resource.get_cache_entry_region(cache_entry, expiration_time)
+            region_entries.setdefault(cache_region, {})[cache_key] = cache_entry
+
+        for cache_region, entries in region_entries.items():
+            cache_region.set_multi(entries)
+
+        if self.local_cache:
+            for cache_key, cache_entry in cache_entries.items():
+                self.local_cache.set(
+                    cache_key, cache_entry, size=len(cache_entry['body']), created_at=cache_entry.get('created_at')
+                )
+
+    @staticmethod
+    def get_cache_entry_media(cache_entry):
+        body = cache_entry['body']
+
+        if cache_entry.get('content_encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        return json.loads(body.decode('utf-8'))
+
+    def process_get_response(self, req, resp, **kwargs):
+        item_type = kwargs.get('item_type')
+
+        if item_type not in self.item_resources:
+            raise falcon.HTTPNotFound()
+
+        resource = self.get_item_resource(item_type)
+        item_ids = self.get_item_ids(req.params)
+
+        cache_keys = {
+            item_id: resource.build_cache_key({}, **{resource.get_item_url_name(): item_id}) for item_id in item_ids
+        }
+
+        cache_entries = self.get_cache_entries(resource, list(cache_keys.values()))
+
+        data = {}
+        not_found = []
+
+        for item_id in item_ids:
+            cache_entry = cache_entries.get(cache_keys[item_id])
+
+            if cache_entry is None:
+                continue
+
+            if cache_entry['status'] == falcon.HTTP_200:
+                data[item_id] = self.get_cache_entry_media(cache_entry)['data']
+            else:
+                not_found.append(item_id)
+
+        missing_ids = [item_id for item_id in item_ids if item_id not in data and item_id not in not_found]
+
+        if missing_ids:
+            new_cache_entries = {}
+
+            for item_id, item in resource.get_items(missing_ids).items():
+                response = resource.get_item_response(item_id, item, [])
+                new_cache_entries[cache_keys[item_id]] = resource.get_cache_entry(response)
+
+                if item:
+                    data[item_id] = response['media']['data']
+                else:
+                    not_found.append(item_id)
+
+            self.set_cache_entries(resource, new_cache_entries)
+
+        return {
+            'status': falcon.HTTP_200,
+            'media': self.get_jsonapi_response(
+                data=[data[item_id] for item_id in item_ids if item_id in data],
+                meta={'not_found': [item_id for item_id in item_ids if item_id in not_found]}
+            ),
+            'cacheable': False
+        }
+
+
+class ExportResource(BaseResource):
+    """ Streams all items of a block range as NDJSON or CSV, e.g. /export/event?from=1000&to=2000&format=csv
+
+    Rows are read in keyset chunks ordered by primary key and written per chunk, so only one chunk is held in
+    memory at a time. The size of the block range is limited to EXPORT_MAX_BLOCK_RANGE.
+    """
+
+    export_models = {
+        'block': Block,
+        'extrinsic': Extrinsic,
+        'event': Event,
+        'transfer': Event
+    }
+
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv'
+    }
+
+    chunk_size = 1000
+
+    def get_block_range(self, params):
+        try:
+            to_block = int(params.get('to', self.chain_head.get_block_id(self.session)))
+            # Without a start block the most recent range of maximum size is exported
+            from_block = int(params.get('from', max(0, to_block - settings.EXPORT_MAX_BLOCK_RANGE + 1)))
+        except ValueError:
+            raise falcon.HTTPBadRequest(description='Parameters from and to must be block numbers')
+
+        if from_block > to_block:
+            raise falcon.HTTPBadRequest(description='Parameter from must not be greater than to')
+
+        if to_block - from_block + 1 > settings.EXPORT_MAX_BLOCK_RANGE:
+            raise falcon.HTTPBadRequest(
+                description='A maximum of {} blocks can be exported at once'.format(settings.EXPORT_MAX_BLOCK_RANGE)
+            )
+
+        return from_block, to_block
+
+    def get_query(self, session, item_type, from_block, to_block):
+        model = self.export_models[item_type]
+        block_column = model.id if model is Block else model.block_id
+
+        # Relationships are not loaded, rows are serialized from their own columns only
+        query = model.query(session).options(noload('*')).filter(block_column >= from_block, block_column <= to_block)
+
+        if item_type == 'transfer':
+            query = query.filter(Event.module_id == 'balances', Event.event_id == 'Transfer')
+
+        return query
+
+    def get_chunks(self, query, model):
+        """ Yields lists of at most chunk_size items, each chunk continues after the primary key of the last item
+        :param query: filtered query of items to export
+        :param model: model of the query
+        :returns: generator of lists of items
+        """
+        primary_key = inspect(model).primary_key
+        query = query.order_by(*primary_key)
+        last_key = None
+
+        while True:
+            chunk_query = query
+
+            if last_key is not None:
+                chunk_query = chunk_query.filter(self.get_cursor_condition(primary_key, last_key, operator.gt))
+
+            items = chunk_query.limit(self.chunk_size).all()
+
+            if not items:
+                break
+
+            yield items
+
+            if len(items) < self.chunk_size:
+                break
+
+            last_key = [getattr(items[-1], column.key) for column in primary_key]
+
+            # Release exported items from the identity map
+            query.session.expunge_all()
+
+    def get_columns(self, item_type):
+        if item_type == 'transfer':
+            return ['id', 'block_id', 'event_idx', 'extrinsic_idx', 'sender', 'destination', 'value', 'fee']
+
+        model = self.export_models[item_type]
+        exclude = model.serialize_exclude or []
+
+        return ['id'] + [prop.key for prop in inspect(model).column_attrs if prop.key not in exclude + ['id']]
+
+    def serialize_item(self, item_type, item):
+        if item_type == 'transfer':
+            return {
+                'type': 'balancetransfer',
+                'id': '{}-{}'.format(item.block_id, item.event_idx),
+                'attributes': {
+                    'block_id': item.block_id,
+                    'event_idx': item.event_idx,
+                    'extrinsic_idx': item.extrinsic_idx,
+                    'sender': ss58_encode(item.attributes[0]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE),
+                    'destination': ss58_encode(item.attributes[1]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE),
+                    'value': item.attributes[2]['value'],
+                    # Some networks don't have fees
+                    'fee': item.attributes[3]['value'] if len(item.attributes) == 4 else 0
+                }
+            }
+
+        return item.serialize()
+
+    def format_csv_row(self, data):
+        row = {'id': data['id']}
+
+        for key, value in data['attributes'].items():
+            if type(value) in (dict, list):
+                value = json.dumps(value, ensure_ascii=False)
+            row[key] = value
+
+        return row
+
+    def generate(self, session, query, item_type, output_format):
+        """ Yields encoded chunks of rows, closes the session when the export is completed or aborted """
+        try:
+            buffer = io.StringIO()
+
+            if output_format == 'csv':
+                writer = csv.DictWriter(buffer, self.get_columns(item_type), extrasaction='ignore')
+                writer.writeheader()
+
+            for items in self.get_chunks(query, self.export_models[item_type]):
+                for item in items:
+                    data = self.serialize_item(item_type, item)
+
+                    if output_format == 'csv':
+                        writer.writerow(self.format_csv_row(data))
+                    else:
+                        buffer.write(json.dumps(data, ensure_ascii=False))
+                        buffer.write('\n')
+
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+
+            if buffer.tell():
+                yield buffer.getvalue().encode('utf-8')
+        finally:
+            session.close()
+
+    def on_get(self, req, resp, item_type):
+        if item_type not in self.export_models:
+            raise falcon.HTTPNotFound()
+
+        output_format = req.params.get('format', 'ndjson')
+
+        if output_format not in self.content_types:
+            raise falcon.HTTPBadRequest(description='Format must be one of: {}'.format(', '.join(self.content_types)))
+
+        from_block, to_block = self.get_block_range(req.params)
+
+        # The request session is closed before the response is streamed, use a dedicated session
+        session = self.session.session_factory()
+
+        resp.status = falcon.HTTP_200
+        resp.content_type = self.content_types[output_format]
+        resp.set_header('Content-Disposition', 'attachment; filename="{}-{}-{}.{}"'.format(
+            item_type, from_block, to_block, output_format
+        ))
+        resp.stream = self.generate(
+            session, self.get_query(session, item_type, from_block, to_block), item_type, output_format
+        )
@@ -0,0 +1,43 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  chain.py
+import time
+
+from app.models.data import Block
+
+
+class ChainHead:
+    """ Keeps track of the highest indexed block, polling the database at most once per poll interval
+
+    By default the head of the block table is tracked, another model with block numbers as id (e.g. BlockTotal)
+    can be provided to track how far that table is processed.
+    """
+
+    def __init__(self, poll_interval=1, model=Block):
+        self.poll_interval = poll_interval
+        self.model = model
+        self.block_id = None
+        self.updated_at = 0
+
+    def get_block_id(self, session):
+        if time.time() - self.updated_at > self.poll_interval:
+            self.block_id = self.model.get_head_id(session) or 0
+            self.updated_at = time.time()
+
+        return self.block_id
@@ -0,0 +1,125 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  networkstats.py
+import threading
+
+from dogpile.cache.api import NO_VALUE
+from sqlalchemy.orm import load_only
+
+from app.models.data import BlockTotal, Runtime
+
+
+class NetworkStatistics:
+    """ Snapshot of network statistics, refreshed once per new chain head or newly processed block
+
+    The snapshot is kept in memory and shared between workers with a single cache key, so only one worker
+    computes it for each new head.
+    """
+
+    cache_key = 'network-statistics-snapshot'
+
+    def __init__(self, cache_region, chain_head, processed_head, blocktime_ranges=(100, 1000, 10000)):
+        self.cache_region = cache_region
+        self.chain_head = chain_head
+        self.processed_head = processed_head
+        self.blocktime_ranges = blocktime_ranges
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+    def create_snapshot(self, session, latest_block_id, latest_processed_block_id):
+        """ Computes network statistics
+        :param session: database session
+        :param latest_block_id: highest indexed block
+        :param latest_processed_block_id: highest block with processed totals
+        :returns: dict with statistics
+        """
+        latest_processed_block = BlockTotal.query(session).filter(
+            BlockTotal.id <= latest_processed_block_id
+        ).order_by(BlockTotal.id.desc()).first()
+
+        if not latest_processed_block:
+            return {
+                'best_block': 0,
+                'latest_block': latest_block_id,
+                'latest_processed_block': 0,
+                'total_signed_extrinsics': 0,
+                'total_events': 0,
+                'total_events_module': 0,
+                'total_blocks': 'N/A',
+                'total_accounts': 0,
+                'total_runtimes': 0,
+                'average_blocktime': {}
+            }
+
+        # Average blocktime over recent ranges, derived from the cumulative blocktime counter
+        previous_blocks = BlockTotal.query(session).options(load_only('id', 'total_blocktime')).filter(
+            BlockTotal.id.in_([latest_processed_block.id - block_count for block_count in self.blocktime_ranges])
+        )
+
+        average_blocktime = {}
+
+        for previous_block in previous_blocks:
+            block_count = latest_processed_block.id - previous_block.id
+            average_blocktime[str(block_count)] = round(
+                float(latest_processed_block.total_blocktime - previous_block.total_blocktime) / block_count, 3
+            )
+
+        return {
+            # Kept for existing clients, equal to latest_processed_block
+            'best_block': latest_processed_block.id,
+            'latest_block': latest_block_id,
+            'latest_processed_block': latest_processed_block.id,
+            'total_signed_extrinsics': int(latest_processed_block.total_extrinsics_signed),
+            'total_events': int(latest_processed_block.total_events),
+            'total_events_module': int(latest_processed_block.total_events_module),
+            'total_blocks': 'N/A',
+            'total_accounts': int(latest_processed_block.total_accounts),
+            'total_runtimes': Runtime.query(session).count(),
+            'average_blocktime': average_blocktime
+        }
+
+    @staticmethod
+    def is_current(snapshot, latest_block_id, latest_processed_block_id):
+        # Snapshots cached by a previous version lack these values and are refreshed
+        return snapshot.get('latest_block', -1) >= latest_block_id and \
+            snapshot.get('latest_processed_block', -1) >= latest_processed_block_id
+
+    def get_snapshot(self, session):
+        """ Returns statistics of the current chain head, computed at most once per head by all workers
+        :param session: database session
+        :returns: dict with statistics
+        """
+        latest_block_id = self.chain_head.get_block_id(session)
+        latest_processed_block_id = self.processed_head.get_block_id(session)
+
+        snapshot = self.snapshot
+
+        if snapshot and self.is_current(snapshot, latest_block_id, latest_processed_block_id):
+            return snapshot
+
+        with self.lock:
+            snapshot = self.cache_region.get(self.cache_key)
+
+            if snapshot is NO_VALUE or not self.is_current(snapshot, latest_block_id, latest_processed_block_id):
+                snapshot = self.create_snapshot(session, latest_block_id, latest_processed_block_id)
+                self.cache_region.set(self.cache_key, snapshot)
+
+            self.snapshot = snapshot
+
+        return snapshot
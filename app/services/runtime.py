@@ -0,0 +1,164 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  runtime.py
+import threading
+
+from sqlalchemy import func
+
+from app.models.data import Runtime, RuntimeCall, RuntimeEvent, RuntimeErrorMessage, RuntimeStorage
+
+
+class RuntimeRegistry:
+    """ Per-process registry of runtime metadata (calls, events and errors) and of the latest storage functions
+
+    Metadata of a spec version is loaded from the database on first use. A spec version is only kept when its
+    runtime is completely indexed. While a runtime is still being indexed, loading is retried once the chain head
+    has moved and items are looked up with a single-row query instead.
+
+    The latest spec version is checked again once the chain head has moved, storage functions resolved for the
+    latest runtime are kept until a new spec version lands.
+    """
+
+    # Model and key columns per item type
+    item_models = {
+        'calls': (RuntimeCall, ('module_id', 'call_id')),
+        'events': (RuntimeEvent, ('module_id', 'event_id')),
+        'errors': (RuntimeErrorMessage, ('module_index', 'index'))
+    }
+
+    def __init__(self, chain_head):
+        self.chain_head = chain_head
+        self.spec_versions = {}
+        self.incomplete_spec_versions = {}
+        self.lock = threading.Lock()
+        self.latest_spec_version = None
+        self.latest_checked_block_id = None
+        self.latest_storage = {}
+
+    def load_spec_version(self, session, spec_version):
+        """ Retrieves metadata of given spec version from the database
+        :param session: database session
+        :param spec_version: spec version of the runtime
+        :returns: dict with calls, events and errors dicts or None if runtime is not (fully) indexed
+        """
+        runtime = Runtime.query(session).filter_by(spec_version=spec_version).first()
+
+        if not runtime:
+            return None
+
+        metadata = {
+            item_type: {
+                tuple(getattr(item, column) for column in columns): item.asdict()
+                for item in model.query(session).filter_by(spec_version=spec_version)
+            }
+            for item_type, (model, columns) in self.item_models.items()
+        }
+
+        if len(metadata['calls']) < runtime.count_call_functions or len(metadata['events']) < runtime.count_events:
+            return None
+
+        return metadata
+
+    def get_spec_version(self, session, spec_version):
+        metadata = self.spec_versions.get(spec_version)
+
+        if metadata is None:
+            head_block_id = self.chain_head.get_block_id(session)
+
+            # Runtime was not completely indexed at this chain head
+            if self.incomplete_spec_versions.get(spec_version) == head_block_id:
+                return None
+
+            with self.lock:
+                metadata = self.spec_versions.get(spec_version)
+
+                if metadata is None:
+                    metadata = self.load_spec_version(session, spec_version)
+
+                    if metadata is None:
+                        self.incomplete_spec_versions[spec_version] = head_block_id
+                        return None
+
+                    self.spec_versions[spec_version] = metadata
+                    self.incomplete_spec_versions.pop(spec_version, None)
+
+        return metadata
+
+    def query_item(self, session, spec_version, item_type, key):
+        """ Retrieves a single item from the database, for items that are not in the registry
+        :returns: dict of item or None if not found
+        """
+        model, columns = self.item_models[item_type]
+
+        item = model.query(session).filter_by(spec_version=spec_version, **dict(zip(columns, key))).first()
+
+        if item:
+            return item.asdict()
+
+    def get_item(self, session, spec_version, item_type, key):
+        metadata = self.get_spec_version(session, spec_version)
+
+        if metadata and key in metadata[item_type]:
+            return metadata[item_type][key]
+
+        return self.query_item(session, spec_version, item_type, key)
+
+    def get_call(self, session, spec_version, module_id, call_id):
+        return self.get_item(session, spec_version, 'calls', (module_id, call_id))
+
+    def get_event(self, session, spec_version, module_id, event_id):
+        return self.get_item(session, spec_version, 'events', (module_id, event_id))
+
+    def get_error(self, session, spec_version, module_index, index):
+        return self.get_item(session, spec_version, 'errors', (module_index, index))
+
+    def get_latest_spec_version(self, session):
+        head_block_id = self.chain_head.get_block_id(session)
+
+        if head_block_id != self.latest_checked_block_id:
+            spec_version = session.query(func.max(Runtime.spec_version)).scalar()
+
+            if spec_version != self.latest_spec_version:
+                self.latest_storage = {}
+                self.latest_spec_version = spec_version
+
+            self.latest_checked_block_id = head_block_id
+
+        return self.latest_spec_version
+
+    def get_latest_storage(self, session, module_id, name):
+        """ Returns the most recent definition of a storage function
+        :param session: database session
+        :param module_id: module of the storage function
+        :param name: name of the storage function
+        :returns: dict of RuntimeStorage or None if not found
+        """
+        self.get_latest_spec_version(session)
+
+        key = (module_id, name)
+
+        if key not in self.latest_storage:
+            storage = RuntimeStorage.query(session).filter_by(
+                module_id=module_id,
+                name=name,
+            ).order_by(RuntimeStorage.spec_version.desc()).first()
+
+            self.latest_storage[key] = storage.asdict() if storage else None
+
+        return self.latest_storage[key]
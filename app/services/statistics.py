@@ -0,0 +1,96 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  statistics.py
+import threading
+import time
+from collections import defaultdict
+
+
+class ResourceStatistics:
+    """ Collects cache and latency counters per resource class
+
+    Counters are accumulated in memory and periodically added to Redis hashes, so the totals of all workers
+    can be read from any of them. Without a Redis backend only the counters of the current process are reported.
+    """
+
+    key_prefix = 'resource-stats'
+
+    def __init__(self, cache_region, flush_interval=10):
+        self.cache_region = cache_region
+        self.flush_interval = flush_interval
+        self.counters = defaultdict(lambda: defaultdict(float))
+        self.totals = defaultdict(lambda: defaultdict(float))
+        self.flushed_at = time.time()
+        self.lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        return getattr(self.cache_region.backend, 'client', None)
+
+    def record_request(self, resource_name, cache_status):
+        with self.lock:
+            self.counters[resource_name]['requests'] += 1
+            self.counters[resource_name][(cache_status or 'uncacheable').lower().replace('-', '_')] += 1
+
+        if time.time() - self.flushed_at > self.flush_interval:
+            self.flush()
+
+    def record_compute(self, resource_name, compute_time, payload_size):
+        with self.lock:
+            self.counters[resource_name]['computed'] += 1
+            self.counters[resource_name]['compute_time'] += compute_time
+            self.counters[resource_name]['payload_bytes'] += payload_size
+
+    def flush(self):
+        with self.lock:
+            counters, self.counters = self.counters, defaultdict(lambda: defaultdict(float))
+            self.flushed_at = time.time()
+
+        if self.redis_client is None:
+            for resource_name, fields in counters.items():
+                for field, value in fields.items():
+                    self.totals[resource_name][field] += value
+            return
+
+        pipe = self.redis_client.pipeline(transaction=False)
+
+        for resource_name, fields in counters.items():
+            pipe.sadd(self.key_prefix, resource_name)
+            for field, value in fields.items():
+                pipe.hincrbyfloat('{}:{}'.format(self.key_prefix, resource_name), field, value)
+
+        pipe.execute()
+
+    def get_totals(self):
+        """ Returns aggregated counters per resource class """
+        self.flush()
+
+        if self.redis_client is None:
+            return {name: dict(fields) for name, fields in self.totals.items()}
+
+        totals = {}
+
+        for resource_name in sorted(self.redis_client.smembers(self.key_prefix)):
+            resource_name = resource_name.decode() if type(resource_name) is bytes else resource_name
+            fields = self.redis_client.hgetall('{}:{}'.format(self.key_prefix, resource_name))
+            totals[resource_name] = {
+                (field.decode() if type(field) is bytes else field): float(value) for field, value in fields.items()
+            }
+
+        return totals
@@ -0,0 +1,182 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  substrate.py
+import itertools
+import threading
+import time
+
+import requests
+from dogpile.cache.api import NO_VALUE
+
+
+class SubstrateRPCClient:
+    """ Per-worker JSON-RPC client for the Substrate node
+
+    HTTP connections are kept alive between requests and multiple storage queries are sent as one JSON-RPC
+    batch, so retrieving several storage entries costs a single round trip.
+
+    The codec libraries and type registry are only loaded on first use, or by init_codec before workers are forked
+    when the application is preloaded.
+
+    When a cache region is provided, storage results at the chain head are cached per block hash and shared
+    between workers, as they can only change when a new block is produced.
+    """
+
+    cache_key_prefix = 'substrate-storage'
+
+    def __init__(self, url, type_registry_preset='default', timeout=10, cache_region=None, head_poll_interval=1,
+                 cache_expiration_time=60):
+        self.url = url
+        self.type_registry_preset = type_registry_preset
+        self.timeout = timeout
+        self.cache_region = cache_region
+        self.head_poll_interval = head_poll_interval
+        self.cache_expiration_time = cache_expiration_time
+        self.http = requests.Session()
+        self.request_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self._substrate = None
+        self.head_hash = None
+        self.head_updated_at = 0
+
+    def init_codec(self):
+        """ Creates SubstrateInterface used for storage key generation and decoding, which loads the type registry """
+        from substrateinterface import SubstrateInterface
+
+        with self.lock:
+            if self._substrate is None:
+                self._substrate = SubstrateInterface(url=self.url, type_registry_preset=self.type_registry_preset)
+
+    @property
+    def substrate(self):
+        if self._substrate is None:
+            self.init_codec()
+
+        return self._substrate
+
+    def rpc_batch(self, calls):
+        """ Performs multiple JSON-RPC calls in one HTTP request
+        :param calls: list of (method, params) tuples
+        :returns: list of results in order of calls
+        """
+        from substrateinterface.exceptions import SubstrateRequestException
+
+        payload = [
+            {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': next(self.request_ids)}
+            for method, params in calls
+        ]
+
+        response = self.http.post(self.url, json=payload, timeout=self.timeout)
+
+        if response.status_code != 200:
+            raise SubstrateRequestException(
+                "RPC request failed with HTTP status code {}".format(response.status_code)
+            )
+
+        responses = {item.get('id'): item for item in response.json()}
+        results = []
+
+        for request in payload:
+            item = responses.get(request['id'])
+
+            if item is None:
+                raise SubstrateRequestException('No response received for {}'.format(request['method']))
+
+            if 'error' in item:
+                raise SubstrateRequestException(item['error']['message'])
+
+            results.append(item.get('result'))
+
+        return results
+
+    def get_head_hash(self):
+        """ Returns hash of the best block, requested from the node at most once per poll interval """
+        if time.time() - self.head_updated_at > self.head_poll_interval:
+            self.head_hash = self.rpc_batch([('chain_getBlockHash', [])])[0]
+            self.head_updated_at = time.time()
+
+        return self.head_hash
+
+    def get_storage_key(self, module, function, params=None, hasher=None):
+        return self.substrate.generate_storage_hash(
+            storage_module=module,
+            storage_function=function,
+            params=params,
+            hashers=[hasher]
+        )
+
+    def decode_storage(self, value, return_scale_type):
+        if return_scale_type and value:
+            from scalecodec import ScaleBytes
+            from scalecodec.base import ScaleDecoder
+
+            return ScaleDecoder.get_decoder_class(
+                type_string=return_scale_type,
+                data=ScaleBytes(value),
+                runtime_config=self.substrate.runtime_config
+            ).decode()
+
+        return value
+
+    def get_storage_batch(self, queries, block_hash=None):
+        """ Retrieves multiple storage entries with a single batched state_getStorageAt request
+        :param queries: list of dicts with module, function, params, hasher and return_scale_type
+        :param block_hash: block at which to query storage, None for chain head
+        :returns: list of decoded values in order of queries
+        """
+        if not queries:
+            return []
+
+        storage_keys = [
+            self.get_storage_key(query['module'], query['function'], query.get('params'), query.get('hasher'))
+            for query in queries
+        ]
+
+        if block_hash is None and self.cache_region is not None:
+            results = self.get_head_storage(storage_keys)
+        else:
+            results = self.rpc_batch([('state_getStorageAt', [storage_key, block_hash]) for storage_key in storage_keys])
+
+        return [
+            self.decode_storage(result, query.get('return_scale_type')) for query, result in zip(queries, results)
+        ]
+
+    def get_head_storage(self, storage_keys):
+        """ Retrieves raw storage values at the best block, using values cached for that block hash
+        :param storage_keys: list of storage keys
+        :returns: list of raw storage values in order of storage keys
+        """
+        head_hash = self.get_head_hash()
+        cache_keys = ['{}:{}:{}'.format(self.cache_key_prefix, head_hash, storage_key) for storage_key in storage_keys]
+
+        results = dict(zip(storage_keys, self.cache_region.get_multi(cache_keys, self.cache_expiration_time)))
+
+        missing_keys = [storage_key for storage_key in storage_keys if results[storage_key] is NO_VALUE]
+
+        if missing_keys:
+            values = self.rpc_batch([('state_getStorageAt', [storage_key, head_hash]) for storage_key in missing_keys])
+
+            results.update(zip(missing_keys, values))
+
+            self.cache_region.set_multi({
+                '{}:{}:{}'.format(self.cache_key_prefix, head_hash, storage_key): value
+                for storage_key, value in zip(missing_keys, values)
+            })
+
+        return [results[storage_key] for storage_key in storage_keys]
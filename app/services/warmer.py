@@ -0,0 +1,104 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  warmer.py
+import logging
+import time
+
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """ Pre-renders a set of URLs into the cache each time a new block is indexed, so clients of the hot
+    endpoints rarely hit a cache miss
+
+    Runs as a separate process with `python -m app.services.warmer` and requests the URLs from the running API
+    over HTTP, so responses are rendered and cached by the workers exactly as for any other client.
+
+    Workers refresh their chain head at most once per api_head_poll_interval, so warming is delayed by that interval
+    after a new block is seen. Otherwise lists would be cached under the previous chain head.
+    """
+
+    def __init__(self, api_url, session_factory, chain_head, urls, poll_interval=1, timeout=30,
+                 api_head_poll_interval=1):
+        self.api_url = api_url.rstrip('/')
+        self.session_factory = session_factory
+        self.chain_head = chain_head
+        self.urls = urls
+        self.poll_interval = poll_interval
+        self.api_head_poll_interval = api_head_poll_interval
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.block_id = None
+
+    def get_head_block_id(self):
+        session = self.session_factory()
+        try:
+            return self.chain_head.get_block_id(session)
+        finally:
+            session.close()
+
+    def warm(self):
+        for url in self.urls:
+            try:
+                response = self.http.get(self.api_url + url, timeout=self.timeout)
+
+                if response.status_code != 200:
+                    logger.warning('Failed to warm cache for {}: HTTP status code {}'.format(
+                        url, response.status_code
+                    ))
+            except requests.RequestException:
+                logger.exception('Failed to warm cache for {}'.format(url))
+
+    def run(self):
+        while True:
+            try:
+                block_id = self.get_head_block_id()
+
+                if block_id != self.block_id:
+                    self.block_id = block_id
+
+                    # Wait until workers poll the new chain head
+                    time.sleep(self.api_head_poll_interval)
+                    self.warm()
+            except Exception:
+                logger.exception('Failed to retrieve chain head')
+
+            time.sleep(self.poll_interval)
+
+
+if __name__ == '__main__':
+    from app.services.chain import ChainHead
+    from app.settings import DB_CONNECTION, DEBUG, CACHE_WARMER_API_URL, CACHE_WARMER_URLS, DOGPILE_CACHE_SETTINGS
+
+    logging.basicConfig(level=logging.INFO)
+
+    engine = create_engine(DB_CONNECTION, echo=DEBUG, isolation_level="READ_UNCOMMITTED", pool_pre_ping=True)
+
+    CacheWarmer(
+        api_url=CACHE_WARMER_API_URL,
+        session_factory=sessionmaker(bind=engine, autoflush=False, autocommit=False),
+        chain_head=ChainHead(poll_interval=DOGPILE_CACHE_SETTINGS['chain_head_poll_interval']),
+        urls=CACHE_WARMER_URLS,
+        poll_interval=DOGPILE_CACHE_SETTINGS['chain_head_poll_interval'],
+        api_head_poll_interval=DOGPILE_CACHE_SETTINGS['chain_head_poll_interval']
+    ).run()
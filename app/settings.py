@@ -30,6 +30,7 @@ DB_CONNECTION = os.environ.get("DB_CONNECTION", "mysql+mysqlconnector://{}:{}@{}
 ))
 
 SUBSTRATE_RPC_URL = os.environ.get("SUBSTRATE_RPC_URL", "http://substrate-node:9933/")
+SUBSTRATE_RPC_TIMEOUT = int(os.environ.get("SUBSTRATE_RPC_TIMEOUT", 10))
 SUBSTRATE_ADDRESS_TYPE = int(os.environ.get("SUBSTRATE_ADDRESS_TYPE", 42))
 SUBSTRATE_TOKEN_DECIMALS = int(os.environ.get("SUBSTRATE_TOKEN_DECIMALS", 12))
 SUBSTRATE_METADATA_VERSION = int(os.environ.get("SUBSTRATE_METADATA_VERSION", 8))
@@ -39,16 +40,36 @@ TYPE_REGISTRY = os.environ.get("TYPE_REGISTRY", "default")
 DOGPILE_CACHE_SETTINGS = {
 
     'default_list_cache_expiration_time': 6,
+    'head_list_cache_expiration_time': int(os.environ.get("HEAD_LIST_CACHE_EXPIRATION_TIME", 60)),
+    'chain_head_poll_interval': float(os.environ.get("CHAIN_HEAD_POLL_INTERVAL", 1)),
+    'debug_headers': os.environ.get("CACHE_DEBUG_HEADERS", "False") == "True",
+    'gzip_min_size': int(os.environ.get("CACHE_GZIP_MIN_SIZE", 1024)),
+    'statistics_flush_interval': int(os.environ.get("STATISTICS_FLUSH_INTERVAL", 10)),
+    'gzip_compress_level': int(os.environ.get("CACHE_GZIP_COMPRESS_LEVEL", 6)),
     'default_detail_cache_expiration_time': 3600,
+    'count_cache_expiration_time': int(os.environ.get("COUNT_CACHE_EXPIRATION_TIME", 600)),
+    'not_found_cache_expiration_time': int(os.environ.get("NOT_FOUND_CACHE_EXPIRATION_TIME", 30)),
+    'incomplete_cache_expiration_time': int(os.environ.get("INCOMPLETE_CACHE_EXPIRATION_TIME", 60)),
+    'storage_cache_expiration_time': int(os.environ.get("STORAGE_CACHE_EXPIRATION_TIME", 60)),
+    'volatile_redis_expiration_time': int(os.environ.get("VOLATILE_CACHE_REDIS_EXPIRATION_TIME", 120)),
     'host': os.environ.get("DOGPILE_CACHE_HOST", "redis"),
     'port': os.environ.get("DOGPILE_CACHE_PORT", 6379),
-    'db': os.environ.get("DOGPILE_CACHE_DB", 10)
+    'db': os.environ.get("DOGPILE_CACHE_DB", 10),
+    'local_cache_max_items': int(os.environ.get("LOCAL_CACHE_MAX_ITEMS", 1000)),
+    'local_cache_max_bytes': int(os.environ.get("LOCAL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
 }
 
 
 DEBUG = False
 
 MAX_RESOURCE_PAGE_SIZE = 100
+MAX_RESOURCE_COUNT = int(os.environ.get("MAX_RESOURCE_COUNT", 10000))
+BALANCE_HISTORY_MAX_POINTS = int(os.environ.get("BALANCE_HISTORY_MAX_POINTS", 1000))
+EXPORT_MAX_BLOCK_RANGE = int(os.environ.get("EXPORT_MAX_BLOCK_RANGE", 10000))
+
+HTTP_CACHE_CONTROL_LIST = os.environ.get("HTTP_CACHE_CONTROL_LIST", "public, max-age=6")
+HTTP_CACHE_CONTROL_IMMUTABLE = os.environ.get("HTTP_CACHE_CONTROL_IMMUTABLE", "public, max-age=31536000, immutable")
+
 LOG_TYPE_AUTHORITIESCHANGE = 1
 
 SEARCH_INDEX_SLASHED_ACCOUNT = 1
@@ -95,6 +116,18 @@ SEARCH_INDEX_SIGNED_EXTRINSIC = 99
 SUBSTRATE_STORAGE_BALANCE = os.environ.get("SUBSTRATE_STORAGE_BALANCE", "FreeBalance")
 USE_NODE_RETRIEVE_BALANCES = os.environ.get("USE_NODE_RETRIEVE_BALANCES", "False")
 
+# Set when application is loaded before workers are forked (gunicorn --preload)
+PRELOAD_APP = os.environ.get("PRELOAD_APP", "False")
+
+# Admin endpoints like /admin/resource-stats are only routed when set, requests must send it in the X-Admin-Token header
+ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN")
+
+# Pre-render hot URLs into the cache when a new block is indexed, started by start.sh when CACHE_WARMER_ENABLED=True
+CACHE_WARMER_API_URL = os.environ.get("CACHE_WARMER_API_URL", "http://127.0.0.1:8000")
+CACHE_WARMER_URLS = os.environ.get(
+    "CACHE_WARMER_URLS", "/block,/extrinsic,/event,/balances/transfer,/networkstats/default"
+).split(',')
+
 try:
     from app.local_settings import *
 except ImportError:
@@ -0,0 +1,141 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  cache.py
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """ Bounded in-process LRU cache, used as a first tier in front of the shared dogpile region
+
+    Entries are evicted in least recently used order when either the maximum number of items or the
+    maximum total size in bytes is exceeded.
+    """
+
+    def __init__(self, max_items=1000, max_bytes=64 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_size(value):
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def get(self, key, expiration_time):
+        """ Retrieves value stored under given key
+        :param key: cache key
+        :param expiration_time: maximum age in seconds of the stored value
+        :returns: stored value or None if not present or expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return None
+
+            value, size, created_at = entry
+
+            if time.time() - created_at > expiration_time:
+                self._remove(key)
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size=None, created_at=None):
+        """ Stores value under given key
+        :param key: cache key
+        :param value: value to store
+        :param size: size of value in bytes, determined by pickling the value if omitted
+        :param created_at: timestamp the value was created, when it was copied from another cache tier
+        """
+        if size is None:
+            size = self.get_size(value)
+
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+            self.entries[key] = (value, size, created_at or time.time())
+            self.current_bytes += size
+
+            while len(self.entries) > self.max_items or self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        value, size, created_at = self.entries.pop(key)
+        self.current_bytes -= size
+
+
+class SingleFlight:
+    """ Collapses concurrent calls for the same key within a process into a single execution """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        """ Executes func, unless a call for the same key is already in flight, in which case its result is shared
+        :param key: identifier of the call
+        :param func: callable without arguments
+        :returns: result of func
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+
+            if is_leader:
+                call = self.calls[key] = {'event': threading.Event(), 'result': None, 'error': None}
+
+        if not is_leader:
+            call['event'].wait()
+
+            if call['error']:
+                raise call['error']
+
+            return call['result']
+
+        try:
+            call['result'] = func()
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call['event'].set()
+
+        return call['result']
@@ -25,9 +25,6 @@
 import base58
 from hashlib import blake2b
 
-from scalecodec import ScaleBytes
-from scalecodec.types import U8, U16, U32, U64
-
 
 def ss58_decode(address, valid_address_type=42):
     checksum_prefix = b'SS58PRE'
@@ -90,32 +87,26 @@ def ss58_encode(address, address_type=42):
 
 def ss58_encode_account_index(account_index, address_type=42):
 
+    # Account index is SCALE encoded as little endian unsigned integer of 1, 2, 4 or 8 bytes
     if 0 <= account_index <= 2**8 - 1:
-        account_idx_encoder = U8()
+        byte_length = 1
     elif 2**8 <= account_index <= 2**16 - 1:
-        account_idx_encoder = U16()
+        byte_length = 2
     elif 2**16 <= account_index <= 2**32 - 1:
-        account_idx_encoder = U32()
+        byte_length = 4
     elif 2**32 <= account_index <= 2**64 - 1:
-        account_idx_encoder = U64()
+        byte_length = 8
     else:
         raise ValueError("Value too large for an account index")
 
-    return ss58_encode(account_idx_encoder.encode(account_index).data, address_type)
+    return ss58_encode(account_index.to_bytes(byte_length, 'little'), address_type)
 
 
 def ss58_decode_account_index(address, valid_address_type=42):
 
     account_index_bytes = ss58_decode(address, valid_address_type)
 
-    if len(account_index_bytes) == 2:
-        return U8(ScaleBytes('0x{}'.format(account_index_bytes))).decode()
-    if len(account_index_bytes) == 4:
-        return U16(ScaleBytes('0x{}'.format(account_index_bytes))).decode()
-    if len(account_index_bytes) == 8:
-        return U32(ScaleBytes('0x{}'.format(account_index_bytes))).decode()
-    if len(account_index_bytes) == 16:
-        return U64(ScaleBytes('0x{}'.format(account_index_bytes))).decode()
+    if len(account_index_bytes) in [2, 4, 8, 16]:
+        return int.from_bytes(bytes.fromhex(account_index_bytes), 'little')
     else:
         raise ValueError("Invalid account index length")
-
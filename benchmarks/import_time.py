@@ -0,0 +1,74 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  import_time.py
+#
+#  Measures time to import the application in a fresh interpreter, as done by every (non-preloaded) worker.
+#
+#  Usage: python benchmarks/import_time.py [--runs 10] [--module app.main]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+CODEC_MODULES = ('scalecodec', 'substrateinterface')
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(','.join(name for name in {codec_modules!r} if name in sys.modules))
+"""
+
+
+def measure(module):
+    """ Imports module in a new interpreter
+    :param module: module to import
+    :returns: tuple of import time in seconds and list of codec modules loaded
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT.format(module=module, codec_modules=CODEC_MODULES)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).decode().splitlines()
+
+    return float(output[-2]), [name for name in output[-1].split(',') if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure application import time')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--module', default='app.main')
+    args = parser.parse_args()
+
+    timings = []
+    codec_modules = []
+
+    for _ in range(args.runs):
+        timing, codec_modules = measure(args.module)
+        timings.append(timing)
+
+    print('import {}: min {:.3f}s, median {:.3f}s over {} runs'.format(
+        args.module, min(timings), statistics.median(timings), args.runs
+    ))
+    print('codec modules loaded: {}'.format(', '.join(codec_modules) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
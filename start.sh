@@ -8,6 +8,11 @@ echo "==========================="
 echo "Environment: $ENVIRONMENT"
 echo "==========================="
 
+if [ "$CACHE_WARMER_ENABLED" = "True" ]; then
+    echo "Running cache warmer..."
+    python -m app.services.warmer &
+fi
+
 echo "Running gunicorn..."
 
 if [ "$ENVIRONMENT" = "dev" ]; then
@@ -18,5 +23,7 @@ if [ "$ENVIRONMENT" = "dev" ]; then
 fi
 
 if [ "$ENVIRONMENT" = "prod" ]; then
-    gunicorn -b 0.0.0.0:8000 --workers=5 app.main:app --worker-class="egg:meinheld#gunicorn_worker"
+    # Load application once before forking workers
+    export PRELOAD_APP=True
+    gunicorn -b 0.0.0.0:8000 --workers=5 --preload app.main:app --worker-class="egg:meinheld#gunicorn_worker"
 fi
@@ -0,0 +1,74 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  conftest.py
+import os
+
+# Run the application against an in-memory database, must be set before app.main is imported
+os.environ.setdefault('DB_CONNECTION', 'sqlite://')
+
+import pytest
+from dogpile.cache.backends.memory import MemoryBackend
+from falcon import testing
+from sqlalchemy import event
+
+from app import main
+from app.models.base import BaseModel
+
+# Tables with MySQL specific definitions, not used by the tests
+MYSQL_ONLY_TABLES = ['data_account_audit', 'data_contract']
+
+
+@pytest.fixture
+def db_session():
+    tables = [table for table in BaseModel.metadata.sorted_tables if table.name not in MYSQL_ONLY_TABLES]
+    BaseModel.metadata.create_all(main.engine, tables=tables)
+
+    session = main.session_factory()
+
+    yield session
+
+    session.close()
+    BaseModel.metadata.drop_all(main.engine, tables=tables)
+
+
+@pytest.fixture
+def client(db_session):
+    # Start every test with empty caches
+    main.cache_region.backend = MemoryBackend({})
+    main.volatile_cache_region.backend = main.cache_region.backend
+    main.local_cache.entries.clear()
+    main.local_cache.current_bytes = 0
+    main.chain_head.updated_at = 0
+
+    return testing.TestClient(main.app)
+
+
+@pytest.fixture
+def statements():
+    """ Records the SQL statements executed while the test runs """
+    recorded = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(main.engine, 'before_cursor_execute', before_cursor_execute)
+
+    yield recorded
+
+    event.remove(main.engine, 'before_cursor_execute', before_cursor_execute)
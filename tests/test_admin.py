@@ -0,0 +1,52 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_admin.py
+import falcon
+import pytest
+from falcon import testing
+
+from app import main
+from app.middleware.cache import CacheMiddleware
+from app.resources import admin
+
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    monkeypatch.setattr(admin, 'ADMIN_API_TOKEN', 'secret')
+
+    app = falcon.API(middleware=[CacheMiddleware(main.cache_region, statistics=main.statistics)])
+    app.add_route('/admin/resource-stats', admin.ResourceStatisticsResource())
+
+    return testing.TestClient(app)
+
+
+def test_resource_stats_are_not_routed_by_default(client):
+    assert client.simulate_get('/admin/resource-stats').status_code == 404
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'guess'}])
+def test_resource_stats_require_token(admin_client, headers):
+    assert admin_client.simulate_get('/admin/resource-stats', headers=headers).status_code == 403
+
+
+def test_resource_stats_with_token(admin_client):
+    response = admin_client.simulate_get('/admin/resource-stats', headers={'X-Admin-Token': 'secret'})
+
+    assert response.status_code == 200
+    assert type(response.json['data']) is list
@@ -0,0 +1,79 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_balance_history.py
+import pytest
+
+from app.models.data import AccountInfoSnapshot
+
+ACCOUNT_ID = 'aa' * 32
+
+
+@pytest.fixture
+def snapshots(db_session):
+    # Balance snapshot every other block from block 10 to 100, balance equals block number
+    for block_id in range(10, 101, 2):
+        db_session.add(AccountInfoSnapshot(block_id=block_id, account_id=ACCOUNT_ID, balance_total=block_id))
+    db_session.commit()
+
+
+def get_history(db_session, from_block, to_block, points):
+    return [
+        (block_id, int(balance))
+        for block_id, balance in AccountInfoSnapshot.get_balance_history(
+            db_session, ACCOUNT_ID, from_block, to_block, points
+        )
+    ]
+
+
+@pytest.mark.parametrize('from_block, to_block, points', [
+    (0, 100, 5),
+    (20, 100, 5),
+    (21, 100, 5),
+    (21, 100, 1),
+    (0, 100, 1000),
+    (50, 50, 3)
+])
+def test_history_does_not_exceed_points(db_session, snapshots, from_block, to_block, points):
+    history = get_history(db_session, from_block, to_block, points)
+
+    assert 0 < len(history) <= points
+    assert [block_id for block_id, balance in history] == sorted(set(block_id for block_id, balance in history))
+
+
+def test_history_starts_with_balance_at_start_of_range(db_session, snapshots):
+    history = get_history(db_session, 21, 100, 5)
+
+    assert len(history) == 5
+    assert history[0] == (21, 20)
+    assert history[-1] == (100, 100)
+
+
+def test_history_without_snapshot_before_range(db_session, snapshots):
+    history = get_history(db_session, 0, 100, 5)
+
+    assert len(history) == 5
+    assert history[-1] == (100, 100)
+
+
+def test_history_of_single_point(db_session, snapshots):
+    assert get_history(db_session, 21, 100, 1) == [(21, 20)]
+
+
+def test_history_of_unknown_account(db_session, snapshots):
+    assert AccountInfoSnapshot.get_balance_history(db_session, 'bb' * 32, 0, 100, 5) == []
@@ -0,0 +1,73 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_cache_regions.py
+import pytest
+from dogpile.cache.backends.memory import MemoryBackend
+
+from app import main
+from app.models.data import Event, RuntimeEvent
+
+
+@pytest.fixture
+def regions(client):
+    """ Separates the storage of both regions, to verify in which region entries are stored """
+    main.volatile_cache_region.backend = MemoryBackend({})
+
+    return main.cache_region.backend._cache, main.volatile_cache_region.backend._cache
+
+
+@pytest.fixture
+def events(db_session):
+    db_session.add(Event(
+        block_id=1, event_idx=0, extrinsic_idx=1, module_id='m', event_id='e', system=0, module=1,
+        spec_version_id=1, attributes=[]
+    ))
+    db_session.add(RuntimeEvent(
+        spec_version=1, module_id='m', event_id='e', index=0, count_attributes=0, documentation='Event'
+    ))
+    db_session.commit()
+
+
+def test_list_entries_are_stored_in_volatile_region(client, events, regions):
+    shared, volatile = regions
+
+    assert client.simulate_get('/event').status_code == 200
+
+    assert [key for key in volatile if 'EventsListResource' in key]
+    assert not [key for key in shared if 'EventsListResource' in key]
+
+
+def test_detail_entries_are_stored_in_shared_region(client, events, regions):
+    shared, volatile = regions
+
+    assert client.simulate_get('/event/1-0').status_code == 200
+
+    assert [key for key in shared if 'EventDetailResource' in key]
+    assert not [key for key in volatile if 'EventDetailResource' in key]
+
+
+@pytest.mark.parametrize('path', ['/event/1-5', '/batch/event?ids=1-5'])
+def test_not_found_entries_are_stored_in_volatile_region(client, events, regions, path):
+    shared, volatile = regions
+
+    path, _, query_string = path.partition('?')
+    assert client.simulate_get(path, query_string=query_string).status_code in (200, 404)
+
+    assert [key for key in volatile if 'EventDetailResource' in key]
+    assert not [key for key in shared if 'EventDetailResource' in key]
@@ -0,0 +1,85 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_cursor_paging.py
+from urllib.parse import urlsplit
+
+import pytest
+
+from app.models.data import Event
+
+BLOCK_IDS = range(1, 6)
+
+# Inserted out of order, so rows of a block are not returned sorted unless requested
+EVENT_IDXS = [2, 0, 3, 1]
+
+
+@pytest.fixture
+def events(db_session):
+    for block_id in BLOCK_IDS:
+        for event_idx in EVENT_IDXS:
+            db_session.add(Event(
+                block_id=block_id, event_idx=event_idx, extrinsic_idx=1, module_id='m', event_id='e', system=0,
+                module=1, spec_version_id=1, attributes=[]
+            ))
+        db_session.add(Event(
+            block_id=block_id, event_idx=9, extrinsic_idx=1, module_id='other', event_id='e', system=0,
+            module=1, spec_version_id=1, attributes=[]
+        ))
+    db_session.commit()
+
+
+def walk(client, path, query_string, link):
+    """ Follows links of given name until no link is returned
+    :returns: list of pages with ids of their items, in order of retrieval
+    """
+    pages = []
+
+    while True:
+        response = client.simulate_get(path, query_string=query_string)
+        assert response.status_code == 200
+
+        pages.append((query_string, [item['id'] for item in response.json['data']]))
+
+        if link not in response.json['links']:
+            return pages
+
+        url = urlsplit(response.json['links'][link])
+        path, query_string = url.path, url.query
+
+
+@pytest.mark.parametrize('page_size', [1, 3, 4])
+def test_next_links_return_every_row_once(client, events, page_size):
+    pages = walk(client, '/event', 'page[size]={}&filter[module_id]=m'.format(page_size), 'next')
+
+    expected = [
+        '{}-{}'.format(block_id, event_idx)
+        for block_id in reversed(BLOCK_IDS) for event_idx in sorted(EVENT_IDXS, reverse=True)
+    ]
+
+    assert [item_id for query_string, item_ids in pages for item_id in item_ids] == expected
+
+
+def test_prev_links_return_previous_pages(client, events):
+    next_pages = [page for page in walk(client, '/event', 'page[size]=3&filter[module_id]=m', 'next') if page[1]]
+
+    # Walk back from the last page
+    prev_pages = [page for page in walk(client, '/event', next_pages[-1][0], 'prev') if page[1]]
+
+    assert [item_ids for query_string, item_ids in reversed(prev_pages)] == \
+        [item_ids for query_string, item_ids in next_pages]
@@ -0,0 +1,56 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_export.py
+import json
+
+import pytest
+
+from app.models.data import Event
+from app.resources.polkascan import ExportResource
+
+BLOCK_IDS = range(1, 6)
+EVENT_IDXS = [2, 0, 3, 1]
+
+
+@pytest.fixture
+def events(db_session):
+    for block_id in BLOCK_IDS:
+        for event_idx in EVENT_IDXS:
+            db_session.add(Event(
+                block_id=block_id, event_idx=event_idx, extrinsic_idx=1, module_id='m', event_id='e', system=0,
+                module=1, spec_version_id=1, attributes=[]
+            ))
+    db_session.commit()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 4, 100])
+def test_export_returns_every_row_once(client, events, statements, monkeypatch, chunk_size):
+    monkeypatch.setattr(ExportResource, 'chunk_size', chunk_size)
+
+    response = client.simulate_get('/export/event', query_string='from=1&to=5')
+
+    assert response.status_code == 200
+    assert [json.loads(line)['id'] for line in response.text.splitlines()] == [
+        '{}-{}'.format(block_id, event_idx) for block_id in BLOCK_IDS for event_idx in sorted(EVENT_IDXS)
+    ]
+
+    # Chunks continue after the last key with an expanded comparison instead of a row value comparison
+    chunk_statements = [statement for statement in statements if 'FROM data_event' in statement]
+    assert len(chunk_statements) == len(BLOCK_IDS) * len(EVENT_IDXS) // chunk_size + 1
+    assert all('(data_event.block_id, data_event.event_idx) >' not in statement for statement in chunk_statements)
@@ -0,0 +1,45 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_local_cache.py
+import time
+
+from app import main
+from app.utils.cache import LocalCache
+
+
+def test_value_expires_by_time_of_creation():
+    local_cache = LocalCache()
+
+    local_cache.set('fresh', 'value', size=5)
+    local_cache.set('copied', 'value', size=5, created_at=time.time() - 5)
+    local_cache.set('expired', 'value', size=5, created_at=time.time() - 7)
+
+    assert local_cache.get('fresh', 6) == 'value'
+    assert local_cache.get('copied', 6) == 'value'
+    assert local_cache.get('expired', 6) is None
+    assert 'expired' not in local_cache.entries
+
+
+def test_entry_from_shared_cache_keeps_time_of_creation(client):
+    client.simulate_get('/block-total')
+
+    cache_key, (cache_entry, size, created_at) = next(iter(main.local_cache.entries.items()))
+
+    assert created_at == cache_entry['created_at']
+    assert main.cache_region.get(cache_key)['created_at'] == created_at
@@ -0,0 +1,138 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_relationship_loading.py
+import pytest
+
+from app.models.data import Account, Block, Event, Extrinsic, SessionNominator
+
+ACCOUNT_IDS = ['{:064x}'.format(idx) for idx in range(1, 6)]
+
+
+def table_statements(statements, table):
+    """ Returns statements selecting rows from given table, excluding count queries """
+    return [
+        statement for statement in statements
+        if 'FROM {}'.format(table) in statement and 'count(' not in statement
+    ]
+
+
+@pytest.fixture
+def accounts(db_session):
+    for account_id in ACCOUNT_IDS:
+        db_session.add(Account(id=account_id, address=account_id[:48], created_at_block=1, updated_at_block=1))
+    db_session.commit()
+
+
+@pytest.fixture
+def extrinsics(db_session, accounts):
+    for block_id in range(1, 21):
+        db_session.add(Extrinsic(
+            block_id=block_id, extrinsic_idx=1, extrinsic_hash='{:064x}'.format(block_id), signed=1, unsigned=0,
+            signedby_address=1, signedby_index=0, address=ACCOUNT_IDS[block_id % len(ACCOUNT_IDS)],
+            module_id='balances', call_id='transfer', params=[], success=1, error=0, spec_version_id=1
+        ))
+    db_session.commit()
+
+
+@pytest.fixture
+def nominators(db_session, accounts):
+    for rank_nominator in range(1, 21):
+        db_session.add(SessionNominator(
+            session_id=1, rank_validator=1, rank_nominator=rank_nominator,
+            nominator_stash=ACCOUNT_IDS[rank_nominator % len(ACCOUNT_IDS)], bonded=rank_nominator
+        ))
+    db_session.commit()
+
+
+@pytest.mark.parametrize('page_size', [2, 10])
+def test_extrinsic_list_loads_accounts_in_one_query(client, extrinsics, statements, page_size):
+    response = client.simulate_get('/extrinsic', query_string='page[size]={}'.format(page_size))
+
+    assert response.status_code == 200
+    assert len(response.json['data']) == page_size
+    assert all(item['attributes']['account']['type'] == 'account' for item in response.json['data'])
+
+    # Main query is executed once, not repeated as subquery to load the accounts
+    assert len(table_statements(statements, 'data_extrinsic')) == 1
+
+    account_statements = table_statements(statements, 'data_account')
+    assert len(account_statements) == 1
+    assert ' IN ' in account_statements[0]
+    assert 'data_extrinsic' not in account_statements[0]
+
+
+@pytest.mark.parametrize('page_size', [2, 10])
+def test_session_nominator_list_joins_accounts(client, nominators, statements, page_size):
+    response = client.simulate_get('/session/nominator', query_string='page[size]={}'.format(page_size))
+
+    assert response.status_code == 200
+    assert len(response.json['data']) == page_size
+    assert all(
+        item['attributes']['nominator_stash_account']['attributes']['address'] for item in response.json['data']
+    )
+
+    # Stash accounts are joined into the page query
+    page_statements = table_statements(statements, 'data_session_nominator')
+    assert len(page_statements) == 1
+    assert 'JOIN data_account' in page_statements[0]
+    assert table_statements(statements, 'data_account') == []
+
+
+def test_statement_count_does_not_depend_on_page_size(client, extrinsics, statements):
+    counts = []
+
+    # Chain head is retrieved by the first request only
+    client.simulate_get('/extrinsic', query_string='page[size]=1')
+
+    for page_size in [2, 10]:
+        statements.clear()
+        client.simulate_get('/extrinsic', query_string='page[size]={}'.format(page_size))
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+
+
+@pytest.fixture
+def failed_extrinsics(db_session, accounts):
+    counts = {column.name: 0 for column in Block.__table__.columns if column.name.startswith(('count_', 'range'))}
+
+    for block_id in range(1, 6):
+        db_session.add(Block(
+            id=block_id, parent_id=block_id - 1, hash='0x{:064x}'.format(block_id),
+            parent_hash='0x{:064x}'.format(block_id - 1), state_root='0x', extrinsics_root='0x', spec_version_id=1,
+            **counts
+        ))
+        db_session.add(Extrinsic(
+            block_id=block_id, extrinsic_idx=1, extrinsic_hash='{:064x}'.format(block_id), signed=1, unsigned=0,
+            signedby_address=1, signedby_index=0, address=ACCOUNT_IDS[0], module_id='balances', call_id='transfer',
+            params=[], success=0, error=1, spec_version_id=1
+        ))
+        db_session.add(Event(
+            block_id=block_id, event_idx=2, extrinsic_idx=1, module_id='system', event_id='ExtrinsicFailed',
+            system=1, module=0, spec_version_id=1, attributes=[{'type': 'DispatchError', 'value': {'BadOrigin': None}}]
+        ))
+    db_session.commit()
+
+
+def test_extrinsic_batch_loads_failed_events_in_one_query(client, failed_extrinsics, statements):
+    response = client.simulate_get('/batch/extrinsic', query_string='ids=1-1,2-1,3-1,4-1,5-1')
+
+    assert response.status_code == 200
+    assert [item['attributes']['error_message'] for item in response.json['data']] == ['Bad origin'] * 5
+    assert len(table_statements(statements, 'data_event')) == 1
@@ -0,0 +1,98 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_runtime_registry.py
+import pytest
+
+from app import main, settings
+from app.models.data import Event, Runtime, RuntimeEvent
+from app.services.runtime import RuntimeRegistry
+
+
+class StandInChainHead:
+
+    def __init__(self, block_id):
+        self.block_id = block_id
+
+    def get_block_id(self, session):
+        return self.block_id
+
+
+@pytest.fixture
+def runtime(db_session):
+    # Runtime with two events of which one is indexed
+    db_session.add(Runtime(id=1, spec_version=1, count_call_functions=0, count_events=2))
+    db_session.add(RuntimeEvent(
+        spec_version=1, module_id='m', event_id='indexed', index=0, count_attributes=0, documentation='Indexed'
+    ))
+    db_session.commit()
+
+
+def add_event(db_session, event_id):
+    db_session.add(Event(
+        block_id=1, event_idx=0, extrinsic_idx=1, module_id='m', event_id=event_id, system=0, module=1,
+        spec_version_id=1, attributes=[]
+    ))
+    db_session.commit()
+
+
+def test_partly_indexed_runtime_is_loaded_once_per_head(db_session, runtime, statements):
+    chain_head = StandInChainHead(10)
+    registry = RuntimeRegistry(chain_head)
+
+    assert registry.get_event(db_session, 1, 'm', 'indexed')['documentation'] == 'Indexed'
+
+    # Single-row lookups until the chain head moves
+    statements.clear()
+    assert registry.get_event(db_session, 1, 'm', 'indexed')['documentation'] == 'Indexed'
+    assert registry.get_event(db_session, 1, 'm', 'pending') is None
+    assert len(statements) == 2
+
+    db_session.add(RuntimeEvent(
+        spec_version=1, module_id='m', event_id='pending', index=1, count_attributes=0, documentation='Pending'
+    ))
+    db_session.commit()
+    chain_head.block_id = 11
+
+    assert registry.get_event(db_session, 1, 'm', 'pending')['documentation'] == 'Pending'
+    assert 1 in registry.spec_versions
+
+    statements.clear()
+    assert registry.get_event(db_session, 1, 'm', 'indexed')['documentation'] == 'Indexed'
+    assert statements == []
+
+
+def test_response_without_documentation_is_not_immutable(client, db_session, runtime):
+    add_event(db_session, 'pending')
+
+    response = client.simulate_get('/event/1-0')
+
+    assert response.status_code == 200
+    assert response.json['data']['attributes']['documentation'] is None
+    assert response.headers['Cache-Control'] == settings.HTTP_CACHE_CONTROL_LIST
+    assert main.cache_region.get('EventDetailResource:event_id=1-0?')['expires_at']
+
+
+def test_response_with_documentation_is_immutable(client, db_session, runtime):
+    add_event(db_session, 'indexed')
+
+    response = client.simulate_get('/event/1-0')
+
+    assert response.status_code == 200
+    assert response.json['data']['attributes']['documentation'] == 'Indexed'
+    assert response.headers['Cache-Control'] == settings.HTTP_CACHE_CONTROL_IMMUTABLE
@@ -0,0 +1,167 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_substrate.py
+import pytest
+import requests_mock
+from dogpile.cache import make_region
+from substrateinterface.exceptions import SubstrateRequestException
+
+from app.services.substrate import SubstrateRPCClient
+
+NODE_URL = 'http://substrate-node:9933/'
+HEAD_HASH = '0x' + 'ab' * 32
+
+STORAGE = {
+    '0x01': '0x0a000000',
+    '0x02': '0x0b000000',
+    '0x03': None
+}
+
+
+class StandInNode:
+    """ Answers JSON-RPC batches like a Substrate node, in reversed order to verify responses are matched by id """
+
+    def __init__(self, storage, errors=None):
+        self.storage = storage
+        self.errors = errors or {}
+        self.batches = []
+
+    def get_result(self, request):
+        if request['method'] == 'chain_getBlockHash':
+            return HEAD_HASH
+        if request['method'] == 'state_getStorageAt':
+            return self.storage[request['params'][0]]
+
+    def __call__(self, request, context):
+        batch = request.json()
+        self.batches.append(batch)
+
+        responses = []
+
+        for item in batch:
+            if item['method'] in self.errors:
+                responses.append({'jsonrpc': '2.0', 'id': item['id'], 'error': {
+                    'code': -32000, 'message': self.errors[item['method']]
+                }})
+            else:
+                responses.append({'jsonrpc': '2.0', 'id': item['id'], 'result': self.get_result(item)})
+
+        return list(reversed(responses))
+
+
+@pytest.fixture
+def node():
+    return StandInNode(STORAGE)
+
+
+@pytest.fixture
+def adapter(node):
+    adapter = requests_mock.Adapter()
+    adapter.register_uri('POST', NODE_URL, json=node)
+    return adapter
+
+
+def create_client(adapter, **kwargs):
+    client = SubstrateRPCClient(NODE_URL, **kwargs)
+    client.http.mount(NODE_URL, adapter)
+
+    # Use storage keys as given, key generation depends on the runtime metadata of the node
+    client.get_storage_key = lambda module, function, params=None, hasher=None: params[0]
+
+    return client
+
+
+def storage_queries(*storage_keys):
+    return [{'module': 'Test', 'function': 'Value', 'params': [storage_key]} for storage_key in storage_keys]
+
+
+def test_rpc_batch_matches_responses_by_id(adapter, node):
+    client = create_client(adapter)
+
+    results = client.rpc_batch([
+        ('state_getStorageAt', ['0x01', None]),
+        ('state_getStorageAt', ['0x02', None]),
+        ('state_getStorageAt', ['0x03', None])
+    ])
+
+    assert results == ['0x0a000000', '0x0b000000', None]
+    assert len(node.batches) == 1
+    assert len(set(item['id'] for item in node.batches[0])) == 3
+
+
+def test_rpc_batch_raises_error_of_item(adapter, node):
+    node.errors = {'chain_getBlockHash': 'Unknown block'}
+    client = create_client(adapter)
+
+    with pytest.raises(SubstrateRequestException, match='Unknown block'):
+        client.rpc_batch([('state_getStorageAt', ['0x01', None]), ('chain_getBlockHash', [])])
+
+
+def test_rpc_batch_raises_on_http_failure():
+    adapter = requests_mock.Adapter()
+    adapter.register_uri('POST', NODE_URL, status_code=503, text='Service Unavailable')
+    client = create_client(adapter)
+
+    with pytest.raises(SubstrateRequestException, match='503'):
+        client.rpc_batch([('chain_getBlockHash', [])])
+
+
+def test_requests_reuse_pooled_session(adapter):
+    client = create_client(adapter)
+    http = client.http
+
+    client.rpc_batch([('chain_getBlockHash', [])])
+    client.rpc_batch([('chain_getBlockHash', [])])
+
+    # Requests only reach the stand-in node through the adapter mounted on the session of the client
+    assert client.http is http
+    assert adapter.call_count == 2
+
+
+def test_get_storage_batch_uses_one_request(adapter, node):
+    client = create_client(adapter)
+
+    results = client.get_storage_batch(storage_queries('0x02', '0x01', '0x03'), block_hash=HEAD_HASH)
+
+    assert results == ['0x0b000000', '0x0a000000', None]
+    assert adapter.call_count == 1
+    assert [item['params'] for item in node.batches[0]] == [
+        ['0x02', HEAD_HASH], ['0x01', HEAD_HASH], ['0x03', HEAD_HASH]
+    ]
+
+
+def test_get_storage_batch_caches_values_per_head(adapter, node):
+    cache_region = make_region().configure('dogpile.cache.memory')
+    client = create_client(adapter, cache_region=cache_region, head_poll_interval=60)
+
+    assert client.get_storage_batch(storage_queries('0x01', '0x02')) == ['0x0a000000', '0x0b000000']
+    assert client.get_storage_batch(storage_queries('0x02', '0x03')) == ['0x0b000000', None]
+
+    # Head hash once, then only storage keys not requested before at this head
+    assert [[item['method'] for item in batch] for batch in node.batches] == [
+        ['chain_getBlockHash'], ['state_getStorageAt', 'state_getStorageAt'], ['state_getStorageAt']
+    ]
+    assert node.batches[2][0]['params'] == ['0x03', HEAD_HASH]
+
+
+def test_get_storage_batch_without_queries(adapter):
+    client = create_client(adapter)
+
+    assert client.get_storage_batch([]) == []
+    assert adapter.call_count == 0